@@ -6,6 +6,7 @@ from numpy import random as np_random
 
 from slh_framework.datasets import TestInstance
 from slh_framework.algorithms import pj_heuristic
+from slh_framework.graph import Renderer
 from slh_framework.simulations import MonteCarlo as Simulation
 
 
@@ -19,9 +20,10 @@ console_handler.setFormatter(console_format)
 logger.addHandler(console_handler)
 
 
-def draw_routes(routes, prepend_name):
-    for index, route in enumerate(routes, start=1):
-        route.draw(f"{prepend_name}_{1}")
+def draw_routes(renderer, solution, prepend_name):
+    renderer.submit(solution, f"{prepend_name}.png")
+    for index, route in enumerate(solution.routes, start=1):
+        renderer.submit(route, f"{prepend_name}_{index}.png", title=f"{prepend_name} route {index}")
 
 
 seed = 1025747
@@ -87,4 +89,5 @@ logger.info(
     """
 )
 
-draw_routes(OBS.routes, "OBS")
\ No newline at end of file
+with Renderer() as renderer:
+    draw_routes(renderer, OBS, "OBS")
\ No newline at end of file
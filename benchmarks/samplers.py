@@ -0,0 +1,77 @@
+"""Iterations each sampler of `MonteCarlo` needs to estimate `reward_after`.
+
+The initial solution of an instance is simulated `replications` times with every
+sampler and a power of 2 number of iterations. The root mean squared error against
+a reference estimate (Sobol points, 8 runs of 2**16 iterations) is printed, with the
+fewest iterations reaching the target relative error.
+
+    python benchmarks/samplers.py p3.4.k --target 0.005
+"""
+import argparse
+
+import numpy as np
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import tests
+from slh_framework.simulations import MonteCarlo, samplers
+
+
+def estimate(solution, iterations, route_max_cost, var_level, sampler, random_state):
+    MonteCarlo.sampler = sampler
+    try:
+        MonteCarlo.batch_simulation(
+            [solution], iterations, route_max_cost, var_level, random_state=random_state
+        )
+    finally:
+        MonteCarlo.sampler = None
+    return solution.reward_after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("instance", nargs="?", default="p3.4.k")
+    parser.add_argument("--target", type=float, default=0.005, help="relative RMSE")
+    parser.add_argument("--replications", type=int, default=50)
+    parser.add_argument("--max-exponent", type=int, default=13)
+    parser.add_argument("--var-level", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1025747)
+    args = parser.parse_args()
+
+    MonteCarlo.condition_factors = {"weather": {"factor": 0.2}, "traffic": {"factor": 0.3}}
+    data = tests[args.instance].instance_data
+    nodes = HeuristicUtils.to_node_list(data["node_list"])
+    _, solution = HeuristicUtils.generate_initial_solution(
+        data, data["fleet_size"], data["route_max_cost"], nodes
+    )
+    simulate = lambda iterations, sampler, random_state: estimate(  # noqa: E731
+        solution, iterations, data["route_max_cost"], args.var_level, sampler, random_state
+    )
+    seeds = np.random.SeedSequence(args.seed)
+    reference = np.mean(
+        [
+            simulate(2**16, samplers["sobol"](), np.random.default_rng(seed))
+            for seed in seeds.spawn(8)
+        ]
+    )
+    print(f"{args.instance}: reward {solution.reward:.2f}, reference reward_after {reference:.3f}")
+
+    iterations = [2**k for k in range(5, args.max_exponent + 1)]
+    print(f"{'sampler':>16}" + "".join(f"{n:>9}" for n in iterations) + "   to target")
+    for name, sampler in samplers.items():
+        rmse = []
+        for n in iterations:
+            errors = [
+                simulate(n, sampler(), np.random.default_rng(seed)) - reference
+                for seed in seeds.spawn(args.replications)
+            ]
+            rmse.append(np.sqrt(np.mean(np.square(errors))) / reference)
+        reached = [n for n, error in zip(iterations, rmse) if error <= args.target]
+        print(
+            f"{name:>16}"
+            + "".join(f"{error:>9.4f}" for error in rmse)
+            + f"{reached[0] if reached else '>' + str(iterations[-1]):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,25 @@
 from ._algorithms import pj_heuristic, simulated_annealing_heuristic
+from .cache import ConstructionCache
+from .checkpoint import Checkpoint
+from .replanning import Plan, replan
+from .selection import OCBA, SuccessiveHalving
+from .shared import SharedInstance
+from .surrogate import Surrogate
+from .tempering import parallel_tempering_heuristic
+from .trace import Trace
 
 
-__all__ = [pj_heuristic, simulated_annealing_heuristic]
+__all__ = [
+    pj_heuristic,
+    simulated_annealing_heuristic,
+    parallel_tempering_heuristic,
+    Checkpoint,
+    ConstructionCache,
+    OCBA,
+    Plan,
+    replan,
+    SharedInstance,
+    SuccessiveHalving,
+    Surrogate,
+    Trace,
+]
@@ -7,84 +7,287 @@ from time import time
 from slh_framework.algorithms.utils import HeuristicUtils
 
 
-def simulated_annealing_heuristic(test_instance, test_data, simulation):
+def simulated_annealing_heuristic(
+    test_instance,
+    test_data,
+    simulation,
+    checkpoint=None,
+    resume=False,
+    batch_simulation=None,
+    candidates=1,
+    shared=None,
+    trace=None,
+    cache=None,
+):
+    """Simulated annealing over the PJ's initial solution.
+
+    Args:
+        test_instance (TestInstance): Test parameters, including `initial_temp`,
+            `cooling_rate` and `min_temp`.
+        test_data (dict): Instance data (fleet size, route max cost and node list).
+        simulation (callable): Simulation used to estimate `reward_after`.
+        checkpoint (Checkpoint, optional): Where the state of the run is periodically saved.
+        resume (bool): Continue the run stored in `checkpoint` with its remaining time budget.
+        batch_simulation (callable, optional): Simulation of a list of solutions in one
+            pass, used to evaluate the candidates of each step together.
+        candidates (int): Number of neighbours generated per step; the one with the
+            best `reward_after` goes through the acceptance test.
+        shared (SharedInstance, optional): Published construction of the instance,
+            used instead of running the alpha sweep; `test_data` should be its
+            `instance_data`.
+        trace (Trace, optional): Records every step (temperature and acceptance)
+            and every new best solution.
+        cache (ConstructionCache, optional): On-disk cache the initial construction
+            is loaded from (or stored to) instead of always running the alpha sweep.
+
+    Returns:
+        Solution: The best solution found.
+
+    Raises:
+        ValueError: If both `shared` and `cache` are given.
+    """
+    _check_construction_sources(shared=shared, cache=cache)
     fleet_size = test_data["fleet_size"]
     route_max_cost = test_data["route_max_cost"]
-    nodes = HeuristicUtils.to_node_list(test_data["node_list"])
-    
-    efficiency_list, initial_solution = HeuristicUtils.generate_initial_solution(
-        test_data, fleet_size, route_max_cost, nodes
-    )
-    simulation(
-        initial_solution,
-        test_instance.short_sim,
-        route_max_cost,
-        test_instance.var_level,
-    )
-    
-    current_solution = initial_solution
-    best_solution = initial_solution
-    best_reward = initial_solution.reward
-    
-    temperature = test_instance.initial_temp
+    if shared is not None:
+        _, nodes, efficiency_list = shared.construction()
+        initial_solution = HeuristicUtils.merge_routes(
+            test_data, fleet_size, route_max_cost, nodes, efficiency_list
+        )
+    elif cache is not None:
+        _, nodes, efficiency_list, initial_solution = cache.construction(test_data)
+    else:
+        nodes = HeuristicUtils.to_node_list(test_data["node_list"])
+        efficiency_list, initial_solution = HeuristicUtils.generate_initial_solution(
+            test_data, fleet_size, route_max_cost, nodes
+        )
     alpha = test_instance.cooling_rate
     min_temp = test_instance.min_temp
-    
-    start_time = time()
-    elapsed = 0
-    
-    while elapsed < test_instance.max_time and temperature > min_temp:
-        new_solution = HeuristicUtils.modify_solution(
-            current_solution, fleet_size, route_max_cost, nodes, efficiency_list
-        )
-        
+
+    if resume:
+        solutions, _, values = checkpoint.load(test_instance, nodes, efficiency_list)
+        current_solution = solutions["current"]
+        best_solution = solutions["best"]
+        best_reward = values["best_reward"]
+        temperature = values["temperature"]
+        iteration = values["iteration"]
+        elapsed = values["elapsed"]
+    else:
         simulation(
-            new_solution,
+            initial_solution,
             test_instance.short_sim,
             route_max_cost,
             test_instance.var_level,
         )
+
+        current_solution = initial_solution
+        best_solution = initial_solution
+        best_reward = initial_solution.reward
+
+        temperature = test_instance.initial_temp
+        iteration = 0
+        elapsed = 0
+
+    def save_checkpoint():
+        checkpoint.save(
+            test_instance,
+            {"current": current_solution, "best": best_solution},
+            best_reward=best_reward,
+            temperature=temperature,
+            iteration=iteration,
+            elapsed=elapsed,
+        )
+
+    start_time = time() - elapsed
+    
+    while elapsed < test_instance.max_time and temperature > min_temp:
+        neighbours = [
+            HeuristicUtils.modify_solution(
+                current_solution, fleet_size, route_max_cost, nodes, efficiency_list
+            )
+            for _ in range(candidates)
+        ]
+        if batch_simulation is not None:
+            batch_simulation(
+                neighbours,
+                test_instance.short_sim,
+                route_max_cost,
+                test_instance.var_level,
+            )
+        else:
+            for neighbour in neighbours:
+                simulation(
+                    neighbour,
+                    test_instance.short_sim,
+                    route_max_cost,
+                    test_instance.var_level,
+                )
+        new_solution = max(neighbours, key=lambda neighbour: neighbour.reward_after)
         
         delta_reward = new_solution.reward - current_solution.reward
         
-        if delta_reward > 0 or random.uniform(0, 1) < math.exp(delta_reward / temperature):
+        accepted = (
+            delta_reward > 0 or random.uniform(0, 1) < math.exp(delta_reward / temperature)
+        )
+        if accepted:
             current_solution = new_solution
             if new_solution.reward > best_reward:
                 best_solution = new_solution
                 best_reward = new_solution.reward
-        
+                if trace is not None:
+                    trace.record(
+                        trace.BEST,
+                        elapsed,
+                        iteration,
+                        best_reward,
+                        best_reward,
+                        new_solution.reward_after,
+                    )
+        if trace is not None:
+            trace.record(
+                trace.STEP,
+                elapsed,
+                iteration,
+                current_solution.reward,
+                best_reward,
+                temperature,
+                accepted,
+            )
+
         temperature *= alpha
+        iteration += 1
         elapsed = time() - start_time
-    
+        if checkpoint is not None and checkpoint.due(elapsed):
+            save_checkpoint()
+
+    if checkpoint is not None:
+        save_checkpoint()
     simulation(best_solution, test_instance.long_sim, route_max_cost, test_instance.var_level)
+    if trace is not None:
+        trace.record(
+            trace.FINAL,
+            elapsed,
+            iteration,
+            best_solution.reward,
+            best_reward,
+            best_solution.reward_after,
+        )
 
     return best_solution
 
 
-def pj_heuristic(test_instance, test_data, simulation):
+def pj_heuristic(
+    test_instance,
+    test_data,
+    simulation,
+    surrogate=None,
+    checkpoint=None,
+    resume=False,
+    batch_simulation=None,
+    selection=None,
+    plan=None,
+    shared=None,
+    trace=None,
+    cache=None,
+):
+    """PJ's biased-randomised heuristic for the stochastic team orienteering problem.
+
+    Args:
+        test_instance (TestInstance): Test parameters (time budget, betas, simulation runs).
+        test_data (dict): Instance data (fleet size, route max cost and node list).
+        simulation (callable): Simulation used to estimate `reward_after`.
+        surrogate (Surrogate, optional): Learned model that screens out candidates
+            unlikely to improve OBS before they are simulated. When resuming, the
+            checkpointed run must have used one too.
+        checkpoint (Checkpoint, optional): Where the state of the run is periodically saved.
+        resume (bool): Continue the run stored in `checkpoint` with its remaining time budget.
+        batch_simulation (callable, optional): Simulation of a list of solutions in one
+            pass, used to evaluate OBD and the elite solutions together at the end.
+        selection (Selection, optional): Ranking-and-selection procedure (e.g. `OCBA`)
+            that picks OBS among OBD and the elite solutions with a fraction of the
+            `long_sim` runs. Takes precedence over `batch_simulation`.
+        plan (Plan, optional): Filled with the construction, OBD, OBS and elite
+            solutions of the run so it can be re-planned with `replan`. If it is
+            already filled, the run warm-starts from it instead of constructing an
+            initial solution.
+        shared (SharedInstance, optional): Published construction of the instance,
+            used instead of running the alpha sweep; `test_data` should be its
+            `instance_data`.
+        trace (Trace, optional): Records every improvement of OBD and OBS, and the
+            progress of the search every `trace.sample_every` iterations.
+        cache (ConstructionCache, optional): On-disk cache the initial construction
+            is loaded from (or stored to) instead of always running the alpha sweep.
+
+    Returns:
+        tuple: The best deterministic (OBD) and best stochastic (OBS) solutions.
+
+    Raises:
+        ValueError: If more than one of a filled `plan`, `shared` and `cache` is
+            given. An empty `plan` is filled from `shared` or `cache`.
+    """
+    warm_start = plan is not None and plan.ready
+    _check_construction_sources(plan=plan if warm_start else None, shared=shared, cache=cache)
     fleet_size = test_data["fleet_size"]
     route_max_cost = test_data["route_max_cost"]
-    nodes = HeuristicUtils.to_node_list(test_data["node_list"])
-    # generate an efficiency list and initial solution using the best alpha value
-    efficiency_list, initial_solution = HeuristicUtils.generate_initial_solution(
-        test_data, fleet_size, route_max_cost, nodes
-    )
-    simulation(
-        initial_solution,
-        test_instance.short_sim,
-        route_max_cost,
-        test_instance.var_level,
-    )
-    # set initial solution as OBDF and OBS solutions
-    OBD = initial_solution
-    OBS = initial_solution
-    # define a set of elite stochastic solutions to consider
-    elite_solutions = deque(maxlen=10)
-    elite_solutions.append(OBS)
+    if warm_start:
+        alpha, nodes, efficiency_list = plan.alpha, plan.nodes, plan.efficiency_list
+    elif shared is not None:
+        alpha, nodes, efficiency_list = shared.construction()
+        initial_solution = HeuristicUtils.merge_routes(
+            test_data, fleet_size, route_max_cost, nodes, efficiency_list
+        )
+    elif cache is not None:
+        alpha, nodes, efficiency_list, initial_solution = cache.construction(test_data)
+    else:
+        nodes = HeuristicUtils.to_node_list(test_data["node_list"])
+        # generate an efficiency list and initial solution using the best alpha value
+        alpha, efficiency_list, initial_solution = HeuristicUtils.generate_initial_construction(
+            test_data, fleet_size, route_max_cost, nodes
+        )
+    if resume:
+        solutions, elites, values = checkpoint.load(test_instance, nodes, efficiency_list)
+        OBD, OBS = solutions["OBD"], solutions["OBS"]
+        elite_solutions = deque(elites, maxlen=10)
+        iteration = values["iteration"]
+        elapsed = values["elapsed"]
+        if surrogate is not None:
+            surrogate.set_state(values)
+    elif warm_start:
+        OBD, OBS = plan.OBD, plan.OBS
+        elite_solutions = deque(plan.elite_solutions, maxlen=10)
+        iteration = 0
+        elapsed = 0
+    else:
+        simulation(
+            initial_solution,
+            test_instance.short_sim,
+            route_max_cost,
+            test_instance.var_level,
+        )
+        if surrogate is not None:
+            surrogate.update(initial_solution, route_max_cost)
+        # set initial solution as OBDF and OBS solutions
+        OBD = initial_solution
+        OBS = initial_solution
+        # define a set of elite stochastic solutions to consider
+        elite_solutions = deque(maxlen=10)
+        elite_solutions.append(OBS)
+        iteration = 0
+        elapsed = 0
+
+    def save_checkpoint():
+        checkpoint.save(
+            test_instance,
+            {"OBD": OBD, "OBS": OBS},
+            elite_solutions,
+            iteration=iteration,
+            elapsed=elapsed,
+            **(surrogate.get_state() if surrogate is not None else {}),
+        )
 
     # search for better deterministic and stochastic solutions
-    elapsed = 0
-    start_time = time()
+    simulated = 0
+    start_time = time() - elapsed
     while elapsed < test_instance.max_time:
         # merge process of the PJs heuristics to generate new deterministic solution
         new_solution = HeuristicUtils.merge_routes(
@@ -93,7 +296,15 @@ def pj_heuristic(test_instance, test_data, simulation):
         # save new best solution
         if new_solution.reward > OBD.reward:
             OBD = new_solution
-        if new_solution.reward > OBS.reward:
+            if trace is not None:
+                trace.record(
+                    trace.OBD, elapsed, iteration, OBD.reward, OBS.reward_after, count=simulated
+                )
+        # the surrogate, if any, discards candidates unlikely to beat OBS
+        if new_solution.reward > OBS.reward and (
+            surrogate is None
+            or surrogate.should_simulate(new_solution, route_max_cost, OBS.reward_after)
+        ):
             # simulate new deterministic solution in stochastic environment
             simulation(
                 new_solution,
@@ -101,22 +312,73 @@ def pj_heuristic(test_instance, test_data, simulation):
                 route_max_cost,
                 test_instance.var_level,
             )
+            simulated += 1
+            if surrogate is not None:
+                surrogate.update(new_solution, route_max_cost)
             # update OBS solution if appropiate
             if new_solution.reward_after > OBS.reward_after:
                 OBS = new_solution
                 elite_solutions.append(new_solution)
+                if trace is not None:
+                    trace.record(
+                        trace.OBS, elapsed, iteration, OBD.reward, OBS.reward_after, count=simulated
+                    )
+        if trace is not None and iteration % trace.sample_every == 0:
+            trace.record(
+                trace.SAMPLE, elapsed, iteration, OBD.reward, OBS.reward_after, count=simulated
+            )
+        iteration += 1
         elapsed = time() - start_time
+        if checkpoint is not None and checkpoint.due(elapsed):
+            save_checkpoint()
+
+    if checkpoint is not None:
+        save_checkpoint()
 
     # simulate elite solutions in stochastic environment
-    simulation(OBD, test_instance.long_sim, route_max_cost, test_instance.var_level)
-    OBS = OBD
-    for elite_solution in elite_solutions:
-        simulation(
-            elite_solution,
+    candidates = list({id(solution): solution for solution in [OBD, *elite_solutions]}.values())
+    if selection is not None:
+        OBS = selection.select(
+            candidates,
+            simulation,
             test_instance.long_sim,
             route_max_cost,
             test_instance.var_level,
         )
-        if elite_solution.reward_after > OBS.reward_after:
-            OBS = elite_solution
+    elif batch_simulation is not None:
+        batch_simulation(
+            candidates, test_instance.long_sim, route_max_cost, test_instance.var_level
+        )
+        OBS = OBD
+        for elite_solution in elite_solutions:
+            if elite_solution.reward_after > OBS.reward_after:
+                OBS = elite_solution
+    else:
+        simulation(OBD, test_instance.long_sim, route_max_cost, test_instance.var_level)
+        OBS = OBD
+        for elite_solution in elite_solutions:
+            simulation(
+                elite_solution,
+                test_instance.long_sim,
+                route_max_cost,
+                test_instance.var_level,
+            )
+            if elite_solution.reward_after > OBS.reward_after:
+                OBS = elite_solution
+
+    if trace is not None:
+        trace.record(
+            trace.FINAL, elapsed, iteration, OBD.reward, OBS.reward_after, OBS.reward, simulated
+        )
+    if plan is not None:
+        plan.record(
+            alpha, nodes, test_data["node_list"], efficiency_list, OBD, OBS, elite_solutions
+        )
     return OBD, OBS
+
+
+def _check_construction_sources(**sources):
+    # every source replaces the alpha sweep, so only one of them can be used
+    given = [name for name, source in sources.items() if source is not None]
+    if len(given) > 1:
+        raise ValueError(f"Conflicting construction sources: {', '.join(given)}; pass only one")
@@ -0,0 +1,136 @@
+import hashlib
+import os
+
+import numpy as np
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.graph import Route
+from slh_framework.simulations.base import Solution
+
+
+class ConstructionCache:
+    """On-disk cache of the deterministic initial construction of an instance.
+
+    The alpha sweep of the initial solution does not depend on the seed, so runs of
+    the same instance (e.g. a sweep over seeds) can share it. Each entry is a
+    compressed `.npz` file named after a hash of the instance content (node list,
+    fleet size and route max cost) and of the alpha grid. It stores the chosen
+    alpha, the sorted efficiency order with the cost and savings of every edge, and
+    the initial solution, so loading it rebuilds exactly the construction of the
+    sweep without any distance computation, sorting or merging. Entries are written
+    atomically, so several processes can share a directory.
+
+    Attributes:
+        directory (str): Where the entries are stored.
+        alphas (np.ndarray): The alpha grid of the sweep.
+        hits (int): Constructions loaded from the cache.
+        misses (int): Constructions computed and stored.
+    """
+
+    version = 1
+
+    def __init__(self, directory, alphas=None):
+        self.directory = directory
+        self.alphas = np.linspace(0, 1, 11) if alphas is None else np.asarray(alphas, dtype=float)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, test_data):
+        """Hash of the instance content and of the alpha grid."""
+        node_list = np.ascontiguousarray(test_data["node_list"], dtype=float)
+        digest = hashlib.sha256()
+        digest.update(f"{self.version}:{node_list.shape}:".encode())
+        digest.update(node_list.tobytes())
+        digest.update(f":{test_data['fleet_size']}:{float(test_data['route_max_cost'])!r}:".encode())
+        digest.update(self.alphas.tobytes())
+        return digest.hexdigest()
+
+    def path(self, test_data):
+        return os.path.join(self.directory, f"{self.key(test_data)}.npz")
+
+    def construction(self, test_data):
+        """Load the construction of an instance, computing and storing it if needed.
+
+        Args:
+            test_data (dict): Instance data (fleet size, route max cost and node list).
+
+        Returns:
+            tuple: The chosen alpha, the nodes (with their depot edges set), the
+            efficiency list and the initial solution.
+        """
+        path = self.path(test_data)
+        nodes = HeuristicUtils.to_node_list(test_data["node_list"])
+        if os.path.exists(path):
+            self.hits += 1
+            return self._load(path, nodes)
+
+        self.misses += 1
+        alpha, efficiency_list, initial_solution = HeuristicUtils.generate_initial_construction(
+            test_data, test_data["fleet_size"], test_data["route_max_cost"], nodes, self.alphas
+        )
+        self._save(path, alpha, nodes, efficiency_list, initial_solution)
+        return alpha, nodes, efficiency_list, initial_solution
+
+    def clear(self):
+        for file in os.listdir(self.directory):
+            if file.endswith(".npz"):
+                os.remove(os.path.join(self.directory, file))
+
+    def _save(self, path, alpha, nodes, efficiency_list, initial_solution):
+        routes = initial_solution.routes
+        arrays = {
+            "alpha": np.array(alpha),
+            "order": np.array(
+                [(edge.origin.id_, edge.end.id_) for edge in efficiency_list], dtype=np.int64
+            ).reshape(-1, 2),
+            "costs": np.array([edge.cost for edge in efficiency_list], dtype=float),
+            "savings": np.array([edge.savings for edge in efficiency_list], dtype=float),
+            "depot_costs": np.array(
+                [(n.depot_to_node.cost, n.node_to_depot.cost) for n in nodes[1:-1]], dtype=float
+            ).reshape(-1, 2),
+            "solution_values": np.array([initial_solution.cost, initial_solution.reward]),
+            "route_offsets": np.cumsum([0] + [len(route.edges) for route in routes]),
+            "route_values": np.array(
+                [(route.cost, route.reward) for route in routes], dtype=float
+            ).reshape(-1, 2),
+            "edges": np.array(
+                [(e.origin.id_, e.end.id_) for route in routes for e in route.edges],
+                dtype=np.int64,
+            ).reshape(-1, 2),
+        }
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def _load(path, nodes):
+        with np.load(path) as data:
+            data = dict(data)
+
+        alpha = float(data["alpha"])
+        efficiency_list = HeuristicUtils.rebuild_efficiency_list(
+            nodes,
+            alpha,
+            data["order"].tolist(),
+            data["costs"].tolist(),
+            data["savings"].tolist(),
+            data["depot_costs"].tolist(),
+        )
+        lookup = HeuristicUtils.edge_lookup(nodes, efficiency_list)
+
+        cost, reward = data["solution_values"].tolist()
+        initial_solution = Solution(cost=cost, reward=reward)
+        route_offsets = data["route_offsets"]
+        edges = data["edges"].tolist()
+        for i, (route_cost, route_reward) in enumerate(data["route_values"].tolist()):
+            route = Route(cost=route_cost, reward=route_reward)
+            route.edges = [
+                lookup[tuple(pair)] for pair in edges[route_offsets[i] : route_offsets[i + 1]]
+            ]
+            initial_solution.routes.append(route)
+        return alpha, nodes, efficiency_list, initial_solution
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: {self.directory}, hits={self.hits}, misses={self.misses}"
@@ -0,0 +1,166 @@
+import os
+import random
+
+import numpy as np
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.graph import Route
+from slh_framework.simulations.base import Solution
+
+
+class Checkpoint:
+    """Periodic snapshot of a heuristic run, stored as a compressed `.npz` file.
+
+    Solutions are stored as arrays of `(origin id, end id)` edge pairs plus their
+    cost/reward values, and are rebuilt on load against the edges of the (deterministic)
+    initial construction, so a checkpoint is a few kilobytes regardless of the
+    instance size. Solutions shared between several slots (e.g. OBS also being an
+    elite) are stored once, keeping the aliasing of the original run. Both the
+    `random` and `numpy.random` states are stored too, so a resumed run continues
+    from the same state with the same random number streams. As the search is
+    bounded by wall-clock time, it only follows the trajectory of an uninterrupted
+    run if it gets the same number of iterations (e.g. under a fake clock).
+
+    Attributes:
+        path (str): File the checkpoint is written to.
+        interval (float): Minimum number of seconds of search between two snapshots.
+    """
+
+    def __init__(self, path, interval=60.0):
+        self.path = path
+        self.interval = float(interval)
+        self._last_saved = 0.0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def due(self, elapsed):
+        return elapsed - self._last_saved >= self.interval
+
+    def save(self, test_instance, solutions, elites=(), **values):
+        """Write a snapshot of the run.
+
+        Args:
+            test_instance (TestInstance): The instance being solved.
+            solutions (dict): Named solutions to keep (e.g. OBD, OBS).
+            elites (iterable): Ordered pool of elite solutions.
+            **values: Counters and other scalars or arrays of the run.
+        """
+        pool, index = [], {}
+        for solution in [*solutions.values(), *elites]:
+            if id(solution) not in index:
+                index[id(solution)] = len(pool)
+                pool.append(solution)
+
+        routes = [route for solution in pool for route in solution.routes]
+        edges = [
+            (edge.origin.id_, edge.end.id_) for route in routes for edge in route.edges
+        ]
+        python_state = random.getstate()
+        numpy_state = np.random.get_state()
+        arrays = {
+            "instance": np.array([test_instance.instance_name, str(test_instance.seed)]),
+            "settings": np.array(self._settings(test_instance), dtype=float),
+            "names": np.array(list(solutions), dtype=str),
+            "named": np.array([index[id(s)] for s in solutions.values()], dtype=np.int64),
+            "elites": np.array([index[id(s)] for s in elites], dtype=np.int64),
+            "solution_offsets": np.cumsum([0] + [len(s.routes) for s in pool]),
+            "solution_values": np.array(
+                [(s.cost, s.reward, s.reward_after) for s in pool], dtype=float
+            ).reshape(-1, 3),
+            "route_offsets": np.cumsum([0] + [len(r.edges) for r in routes]),
+            "route_values": np.array(
+                [(r.cost, r.reward) for r in routes], dtype=float
+            ).reshape(-1, 2),
+            "edges": np.array(edges, dtype=np.int64).reshape(-1, 2),
+            "python_rng": np.array(python_state[1], dtype=np.uint32),
+            "python_gauss": np.array(
+                np.nan if python_state[2] is None else python_state[2]
+            ),
+            "numpy_rng": numpy_state[1],
+            "numpy_rng_extra": np.array(numpy_state[2:], dtype=float),
+        }
+        arrays.update({f"value_{key}": np.asarray(value) for key, value in values.items()})
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temporary_path, self.path)
+        self._last_saved = float(values.get("elapsed", self._last_saved))
+
+    def load(self, test_instance, nodes, efficiency_list):
+        """Read the snapshot back and restore both random number generators.
+
+        Args:
+            test_instance (TestInstance): The instance being solved; it must match
+                the one the checkpoint was written for.
+            nodes (list): Nodes of the instance, with their depot edges set.
+            efficiency_list (list): Edges of the initial construction.
+
+        Returns:
+            tuple: The named solutions (dict), the elite solutions (list) and the
+            stored values (dict).
+
+        Raises:
+            ValueError: If the checkpoint belongs to another instance or seed, or
+                was written with another `max_time` or `var_level`.
+        """
+        with np.load(self.path) as data:
+            data = dict(data)
+
+        instance = [test_instance.instance_name, str(test_instance.seed)]
+        if data["instance"].tolist() != instance:
+            raise ValueError(
+                f"Checkpoint {self.path} was written for {data['instance'].tolist()}, not {instance}"
+            )
+
+        settings = self._settings(test_instance)
+        if data["settings"].tolist() != settings:
+            raise ValueError(
+                f"Checkpoint {self.path} was written with max_time, var_level = "
+                f"{data['settings'].tolist()}, not {settings}"
+            )
+
+        lookup = HeuristicUtils.edge_lookup(nodes, efficiency_list)
+
+        route_offsets = data["route_offsets"]
+        routes = []
+        for i, (cost, reward) in enumerate(data["route_values"].tolist()):
+            route = Route(cost=cost, reward=reward)
+            route.edges = [
+                lookup[pair]
+                for pair in map(tuple, data["edges"][route_offsets[i] : route_offsets[i + 1]].tolist())
+            ]
+            routes.append(route)
+
+        solution_offsets = data["solution_offsets"]
+        pool = []
+        for i, (cost, reward, reward_after) in enumerate(data["solution_values"].tolist()):
+            solution = Solution(cost=cost, reward=reward, reward_after=reward_after)
+            solution.routes = routes[solution_offsets[i] : solution_offsets[i + 1]]
+            pool.append(solution)
+
+        gauss = float(data["python_gauss"])
+        random.setstate(
+            (3, tuple(data["python_rng"].tolist()), None if np.isnan(gauss) else gauss)
+        )
+        position, has_gauss, cached_gaussian = data["numpy_rng_extra"].tolist()
+        np.random.set_state(
+            ("MT19937", data["numpy_rng"], int(position), int(has_gauss), cached_gaussian)
+        )
+
+        solutions = {
+            str(name): pool[i] for name, i in zip(data["names"], data["named"].tolist())
+        }
+        elites = [pool[i] for i in data["elites"].tolist()]
+        values = {
+            key[len("value_"):]: value.item() if value.ndim == 0 else value
+            for key, value in data.items()
+            if key.startswith("value_")
+        }
+        self._last_saved = float(values.get("elapsed", 0.0))
+        return solutions, elites, values
+
+    @staticmethod
+    def _settings(test_instance):
+        return [float(test_instance.max_time), float(test_instance.var_level)]
@@ -0,0 +1,207 @@
+import operator
+
+from contextlib import contextmanager, nullcontext
+from copy import copy
+
+import numpy as np
+
+from slh_framework.algorithms._algorithms import pj_heuristic
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.graph import Edge, Route
+from slh_framework.simulations.base import Solution
+
+
+class Plan:
+    """State of a `pj_heuristic` run kept to re-plan it when conditions change.
+
+    Pass an empty plan to `pj_heuristic` to fill it, then call `replan` with the
+    updated instance data: the run continues from the kept construction and
+    solutions instead of starting over.
+
+    Attributes:
+        alpha (float): The alpha value of the efficiency list.
+        nodes (list): The nodes of the instance, with their depot edges set.
+        node_list (np.ndarray): Coordinates and rewards the plan was built for.
+        efficiency_list (list): The edges sorted from higher to lower efficiency.
+        OBD (Solution): Our best deterministic solution.
+        OBS (Solution): Our best stochastic solution.
+        elite_solutions (list): Elite solutions, oldest first.
+    """
+
+    def __init__(self):
+        self.alpha = None
+        self.nodes = None
+        self.node_list = None
+        self.efficiency_list = None
+        self.OBD = self.OBS = None
+        self.elite_solutions = []
+
+    @property
+    def ready(self):
+        return self.efficiency_list is not None
+
+    def record(self, alpha, nodes, node_list, efficiency_list, OBD, OBS, elite_solutions):
+        self.alpha = alpha
+        self.nodes = nodes
+        self.node_list = np.array(node_list, dtype=float)[:, :3]
+        self.efficiency_list = efficiency_list
+        self.OBD, self.OBS = OBD, OBS
+        self.elite_solutions = list(elite_solutions)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: alpha={self.alpha}, OBD={self.OBD}, OBS={self.OBS}"
+
+
+def replan(
+    test_instance,
+    test_data,
+    simulation,
+    plan,
+    condition_factors=None,
+    simulation_class=None,
+    max_time=1.0,
+    long_sim=None,
+    **kwargs,
+):
+    """Re-plan a `pj_heuristic` run after the instance or its conditions changed.
+
+    The plan gets new nodes, with the rewards and coordinates of
+    `test_data["node_list"]`, and new edges; the nodes, edges and solutions
+    returned before are left untouched. If no node moved, the edges are copies of
+    the kept ones, only the efficiency of the edges touching a node whose reward
+    changed is recomputed and the list is re-sorted; otherwise the efficiency list
+    is rebuilt with the alpha of the plan (no alpha sweep in both cases). The kept
+    solutions are then repaired against the new edges: routes going over
+    the new `route_max_cost` are dropped, at most `fleet_size` routes are kept, and
+    every solution is re-simulated `short_sim` times under the new conditions.
+    Finally the search continues from the repaired OBD and OBS for `max_time`
+    seconds.
+
+    Args:
+        test_instance (TestInstance): The instance being solved.
+        test_data (dict): The updated instance data.
+        simulation (callable): The simulation used to evaluate solutions.
+        plan (Plan): A plan filled by `pj_heuristic`; it is updated with the result.
+        condition_factors (dict, optional): New condition factors of the simulation.
+        simulation_class (type, optional): The simulation class whose
+            `condition_factors` are replaced; required with `condition_factors`. The
+            previous factors are restored once the re-planning is done.
+        max_time (float): Seconds of search after the repair.
+        long_sim (int, optional): Number of runs of the final evaluation, defaults
+            to the one of `test_instance`.
+        **kwargs: Passed on to `pj_heuristic`.
+
+    Returns:
+        tuple: The new OBD and OBS.
+
+    Raises:
+        ValueError: If the plan is empty, the number of nodes changed, or
+            `condition_factors` is given without `simulation_class`.
+    """
+    if not plan.ready:
+        raise ValueError("The plan is empty, fill it with a pj_heuristic run first")
+    node_list = np.array(test_data["node_list"], dtype=float)[:, :3]
+    if node_list.shape != plan.node_list.shape:
+        raise ValueError(
+            f"Cannot re-plan {len(plan.node_list)} nodes for {len(node_list)} nodes"
+        )
+    if condition_factors is None:
+        conditions = nullcontext()
+    elif simulation_class is None:
+        raise ValueError("Pass the simulation_class whose condition_factors to replace")
+    else:
+        conditions = _replaced_condition_factors(simulation_class, condition_factors)
+    with conditions:
+        return _replan(
+            test_instance, test_data, simulation, plan, node_list, max_time, long_sim, **kwargs
+        )
+
+
+def _replan(test_instance, test_data, simulation, plan, node_list, max_time, long_sim, **kwargs):
+    moved = (node_list[:, :2] != plan.node_list[:, :2]).any()
+    changed = set(np.flatnonzero(node_list[:, 2] != plan.node_list[:, 2]).tolist())
+    # new nodes and edges: the solutions returned before still use the old ones
+    nodes = HeuristicUtils.to_node_list(node_list)
+
+    alpha = plan.alpha
+    if moved:
+        efficiency_list = HeuristicUtils.generate_efficiency_list(nodes, alpha)
+    else:
+        efficiency_list = _copy_edges(plan.nodes, plan.efficiency_list, nodes)
+        if changed:
+            for edge in efficiency_list:
+                if edge.origin.id_ in changed or edge.end.id_ in changed:
+                    edge_reward = edge.origin.reward + edge.end.reward
+                    edge.efficiency = alpha * edge.savings + (1 - alpha) * edge_reward
+            efficiency_list.sort(key=operator.attrgetter("efficiency"), reverse=True)
+
+    lookup = HeuristicUtils.edge_lookup(nodes, efficiency_list)
+    kept = {id(solution): solution for solution in [plan.OBD, *plan.elite_solutions]}
+    solutions = [
+        _repair(solution, lookup, test_data["fleet_size"], test_data["route_max_cost"])
+        for solution in kept.values()
+    ]
+    for solution in solutions:
+        simulation(
+            solution,
+            test_instance.short_sim,
+            test_data["route_max_cost"],
+            test_instance.var_level,
+        )
+    OBD = max(solutions, key=operator.attrgetter("reward"))
+    OBS = max(solutions, key=operator.attrgetter("reward_after"))
+    plan.record(alpha, nodes, node_list, efficiency_list, OBD, OBS, solutions)
+
+    test_instance = copy(test_instance)
+    test_instance.max_time = max_time
+    if long_sim is not None:
+        test_instance.long_sim = long_sim
+    return pj_heuristic(test_instance, test_data, simulation, plan=plan, **kwargs)
+
+
+@contextmanager
+def _replaced_condition_factors(simulation_class, condition_factors):
+    # restores the attribute as it was, including inherited from a base class
+    own = "condition_factors" in vars(simulation_class)
+    previous = simulation_class.condition_factors
+    simulation_class.condition_factors = condition_factors
+    try:
+        yield
+    finally:
+        if own:
+            simulation_class.condition_factors = previous
+        else:
+            del simulation_class.condition_factors
+
+
+def _copy_edges(old_nodes, efficiency_list, nodes):
+    # same costs and savings, on the new nodes
+    start, finish = nodes[0], nodes[-1]
+    for old, node in zip(old_nodes[1:-1], nodes[1:-1]):
+        node.depot_to_node = Edge(start, node, old.depot_to_node.cost)
+        node.node_to_depot = Edge(node, finish, old.node_to_depot.cost)
+    copies = {}
+    for edge in efficiency_list:
+        copies[(edge.origin.id_, edge.end.id_)] = Edge(
+            nodes[edge.origin.id_], nodes[edge.end.id_], edge.cost, edge.savings, edge.efficiency
+        )
+    for (i, j), edge in copies.items():
+        edge.inverse_edge = copies.get((j, i))
+    return list(copies.values())
+
+
+def _repair(solution, lookup, fleet_size, route_max_cost):
+    repaired = Solution()
+    for route in solution.routes:
+        edges = [lookup[(edge.origin.id_, edge.end.id_)] for edge in route.edges]
+        cost = sum(edge.cost for edge in edges)
+        if cost <= route_max_cost:
+            repaired.routes.append(
+                Route(cost=cost, reward=sum(edge.end.reward for edge in edges))
+            )
+            repaired.routes[-1].edges = edges
+    repaired.routes.sort(key=operator.attrgetter("reward"), reverse=True)
+    del repaired.routes[fleet_size:]
+    repaired.cost = sum(route.cost for route in repaired.routes)
+    repaired.reward = sum(route.reward for route in repaired.routes)
+    return repaired
@@ -0,0 +1,159 @@
+import math
+
+import numpy as np
+
+
+class Selection:
+    """Ranking-and-selection of the best solution under a simulation budget.
+
+    Candidates are simulated in batches of `batch_size` runs; each call to the
+    simulation yields a batch mean, and the batch means are pooled into a running
+    mean and a per-run standard deviation for every candidate. When the procedure
+    ends, `reward_after` of every candidate holds its pooled mean.
+
+    Attributes:
+        budget_fraction (float): Total number of runs, as a fraction of simulating
+            every candidate `max_iterations` times. Never below `max_iterations`.
+        batch_size (int): Number of runs per simulation call.
+        initial_batches (int): Batches every candidate gets before allocation starts.
+        means (np.ndarray): Pooled `reward_after` estimate of each candidate.
+        stds (np.ndarray): Per-run standard deviation estimate of each candidate.
+        runs (np.ndarray): Number of runs given to each candidate.
+        survivors (list): Indices of the candidates still in contention when the
+            allocation ends; the best one is selected among them.
+        confidence (float): Approximate probability that the selected candidate is
+            the best one (Bonferroni bound on pairwise comparisons).
+    """
+
+    def __init__(self, budget_fraction=0.4, batch_size=10, initial_batches=4):
+        self.budget_fraction = budget_fraction
+        self.batch_size = batch_size
+        self.initial_batches = initial_batches
+        self.means = self.stds = self.runs = None
+        self.survivors = None
+        self.confidence = None
+
+    def select(self, candidates, simulation, max_iterations, route_max_cost, var_level):
+        """Return the candidate with the best estimated `reward_after`.
+
+        Args:
+            candidates (list): Solutions to choose from; ties go to the first one.
+            simulation (callable): Simulation used to estimate `reward_after`.
+            max_iterations (int): Runs a full evaluation would give each candidate.
+            route_max_cost (float): Maximum cost of a route.
+            var_level (float): The variance level.
+        """
+        self._candidates = candidates
+        self._simulation = lambda solution, runs: simulation(
+            solution, runs, route_max_cost, var_level
+        )
+        count = len(candidates)
+        self._sums = np.zeros(count)
+        self._squares = np.zeros(count)
+        self._batches = np.zeros(count, dtype=int)
+        self.runs = np.zeros(count, dtype=int)
+        self.survivors = list(range(count))
+        budget = max(max_iterations, int(self.budget_fraction * count * max_iterations))
+
+        for index in range(count):
+            for _ in range(self.initial_batches):
+                self._simulate(index, self.batch_size)
+        self._allocate(budget)
+
+        # eliminated candidates have the fewest runs and the noisiest means
+        best = max(self.survivors, key=lambda index: self.means[index])
+        self.confidence = self._confidence(best)
+        for candidate, mean in zip(candidates, self.means.tolist()):
+            candidate.reward_after = mean
+        return candidates[best]
+
+    def _allocate(self, budget):
+        raise NotImplementedError
+
+    def _simulate(self, index, runs):
+        solution = self._candidates[index]
+        self._simulation(solution, runs)
+        # batch means weighted by their size, see the `stds` estimate below
+        self._sums[index] += runs * solution.reward_after
+        self._squares[index] += runs * solution.reward_after**2
+        self._batches[index] += 1
+        self.runs[index] += runs
+        self._update()
+
+    def _update(self):
+        runs = np.maximum(self.runs, 1)
+        self.means = self._sums / runs
+        spread = np.maximum(self._squares - runs * self.means**2, 0.0)
+        self.stds = np.sqrt(spread / np.maximum(self._batches - 1, 1))
+
+    def _confidence(self, best):
+        scale = np.sqrt(self.stds**2 / np.maximum(self.runs, 1))
+        error = 0.0
+        for index in self.survivors:
+            if index == best:
+                continue
+            deviation = math.hypot(scale[best], scale[index])
+            gap = self.means[best] - self.means[index]
+            if deviation == 0:
+                error += 0.0 if gap > 0 else 0.5
+            else:
+                error += 0.5 * math.erfc(gap / deviation / math.sqrt(2))
+        return max(0.0, 1.0 - error)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: runs={self.runs}, confidence={self.confidence}"
+
+
+class OCBA(Selection):
+    """Optimal computing budget allocation (Chen et al., 2000).
+
+    Each round spreads `round_size` batches over the candidates following the OCBA
+    ratios: candidates close to the current best and noisy get more runs, clearly
+    dominated ones get (almost) none.
+
+    Attributes:
+        round_size (int): Batches handed out per allocation round.
+    """
+
+    def __init__(self, budget_fraction=0.4, batch_size=10, initial_batches=4, round_size=2):
+        super().__init__(budget_fraction, batch_size, initial_batches)
+        self.round_size = round_size
+
+    def _allocate(self, budget):
+        while self.runs.sum() + self.batch_size <= budget:
+            batches = min(self.round_size, (budget - self.runs.sum()) // self.batch_size)
+            total = self.runs.sum() + batches * self.batch_size
+            extra = np.maximum(self.ratios() * total - self.runs, 0.0)
+            for _ in range(batches):
+                index = int(np.argmax(extra))
+                self._simulate(index, self.batch_size)
+                extra[index] -= self.batch_size
+
+    def ratios(self):
+        """OCBA share of the total budget that each candidate should receive."""
+        if len(self.means) == 1:
+            return np.ones(1)
+        best = int(np.argmax(self.means))
+        stds = np.maximum(self.stds, 1e-9)
+        gaps = np.maximum(self.means[best] - self.means, 1e-9)
+        weights = (stds / gaps) ** 2
+        others = np.arange(len(weights)) != best
+        weights[best] = stds[best] * math.sqrt(np.sum(weights[others] ** 2 / stds[others] ** 2))
+        return weights / weights.sum()
+
+
+class SuccessiveHalving(Selection):
+    """Successive halving: equal runs for the survivors, worse half dropped each round."""
+
+    def _allocate(self, budget):
+        rounds = max(1, math.ceil(math.log2(len(self.survivors))))
+        remaining = budget - self.runs.sum()
+        for round_ in range(rounds):
+            per_candidate = remaining // (rounds - round_) // len(self.survivors)
+            for index in self.survivors:
+                for _ in range(per_candidate // self.batch_size):
+                    self._simulate(index, self.batch_size)
+                    remaining -= self.batch_size
+            if len(self.survivors) > 1:
+                ranked = sorted(self.survivors, key=lambda index: -self.means[index])
+                self.survivors = sorted(ranked[: math.ceil(len(ranked) / 2)])
@@ -0,0 +1,324 @@
+import atexit
+import json
+
+from collections.abc import Sequence
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.graph import Edge
+
+
+class SharedInstance:
+    """Instance data and its initial construction published once in shared memory.
+
+    The publishing process runs the alpha sweep of the initial construction and
+    writes the node list, the distance and savings matrices and the sorted
+    efficiency order into a single shared memory block, prefixed by a small JSON
+    header describing its layout. Workers attach to the block by name (pickling a
+    `SharedInstance` only sends its name), so the arrays are mapped rather than
+    copied, and `construction` serves the efficiency list straight from them: edges
+    are only built when a construction first reaches them, without any distance
+    computation, alpha sweep or sorting.
+
+    A process maps a block once: attaching to it again, e.g. when unpickling it for
+    every task of a pool, returns the same mapping, which stays open until `close`
+    or the end of the process. Its construction is built once too, so the edges
+    and their compiled simulation state are reused by every run of the process.
+
+    Workers must be children of the publishing process, which owns the block and
+    releases it with `unlink` (or by leaving the `with` block).
+
+    Attributes:
+        name (str): Name of the shared memory block.
+        alpha (float): The alpha value of the efficiency list.
+        fleet_size (int): Number of vehicles.
+        route_max_cost (float): Maximum cost of a route.
+        node_list (np.ndarray): Coordinates and rewards, shape (n, 3).
+        distances (np.ndarray): Edge costs, shape (n, n).
+        savings (np.ndarray): Edge savings, shape (n, n).
+        order (np.ndarray): `(origin id, end id)` of the edges from higher to lower
+            efficiency, shape (m, 2).
+        positions (np.ndarray): Position of every edge in `order`, -1 for the depot
+            edges, shape (n, n).
+    """
+
+    _header_size = 8
+    _header_capacity = 1024
+    _alignment = 64
+
+    def __init__(self, block, owner=False):
+        self._block = block
+        self._owner = owner
+        self._construction = None
+        size = int.from_bytes(block.buf[: self._header_size], "little")
+        header = json.loads(bytes(block.buf[self._header_size : self._header_size + size]))
+        self.alpha = header["alpha"]
+        self.fleet_size = header["fleet_size"]
+        self.route_max_cost = header["route_max_cost"]
+        for key, (offset, shape, dtype) in header["arrays"].items():
+            array = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+            array.flags.writeable = owner
+            setattr(self, key, array)
+
+    @property
+    def name(self):
+        return self._block.name
+
+    @property
+    def instance_data(self):
+        """The instance data, with `node_list` pointing to the shared block."""
+        return {
+            "number_of_nodes": len(self.node_list),
+            "fleet_size": self.fleet_size,
+            "route_max_cost": self.route_max_cost,
+            "node_list": self.node_list,
+        }
+
+    @classmethod
+    def publish(cls, test_data, alpha=None, name=None):
+        """Build the initial construction of an instance and publish it.
+
+        Args:
+            test_data (dict): Instance data (fleet size, route max cost and node list).
+            alpha (float, optional): Alpha value of the efficiency list. By default it
+                is chosen by the alpha sweep of the initial solution.
+            name (str, optional): Name of the shared memory block, random by default.
+
+        Returns:
+            SharedInstance: The owner of the block.
+        """
+        fleet_size = test_data["fleet_size"]
+        route_max_cost = test_data["route_max_cost"]
+        nodes = HeuristicUtils.to_node_list(test_data["node_list"])
+        if alpha is None:
+            alpha, efficiency_list, _ = HeuristicUtils.generate_initial_construction(
+                test_data, fleet_size, route_max_cost, nodes
+            )
+        else:
+            efficiency_list = HeuristicUtils.generate_efficiency_list(nodes, alpha)
+
+        # costs and savings are taken from the edges themselves, so the rebuilt
+        # construction is bit-identical to the one of the publishing process
+        count = len(nodes)
+        distances = np.zeros((count, count))
+        savings = np.zeros((count, count))
+        for node in nodes[1:-1]:
+            for edge in (node.depot_to_node, node.node_to_depot):
+                distances[edge.origin.id_, edge.end.id_] = edge.cost
+        order = np.array(
+            [(edge.origin.id_, edge.end.id_) for edge in efficiency_list], dtype=np.int64
+        ).reshape(-1, 2)
+        distances[order[:, 0], order[:, 1]] = [edge.cost for edge in efficiency_list]
+        savings[order[:, 0], order[:, 1]] = [edge.savings for edge in efficiency_list]
+        positions = np.full((count, count), -1, dtype=np.int64)
+        positions[order[:, 0], order[:, 1]] = np.arange(len(order))
+        arrays = {
+            "node_list": np.array([(n.x, n.y, n.reward) for n in nodes], dtype=float),
+            "distances": distances,
+            "savings": savings,
+            "order": order,
+            "positions": positions,
+        }
+
+        layout, offset = {}, cls._header_capacity
+        for key, array in arrays.items():
+            layout[key] = (offset, array.shape, array.dtype.str)
+            offset += -(-array.nbytes // cls._alignment) * cls._alignment
+        header = json.dumps(
+            {
+                "alpha": float(alpha),
+                "fleet_size": int(fleet_size),
+                "route_max_cost": float(route_max_cost),
+                "arrays": layout,
+            }
+        ).encode()
+        if cls._header_size + len(header) > cls._header_capacity:
+            raise ValueError(f"The header of {len(header)} bytes does not fit the block")
+
+        block = shared_memory.SharedMemory(name=name, create=True, size=offset)
+        block.buf[: cls._header_size] = len(header).to_bytes(cls._header_size, "little")
+        block.buf[cls._header_size : cls._header_size + len(header)] = header
+        instance = cls(block, owner=True)
+        for key, array in arrays.items():
+            getattr(instance, key)[...] = array
+        return instance
+
+    @classmethod
+    def attach(cls, name):
+        """Map a block published by another process, without copying it.
+
+        The mapping is shared by every attachment of this process to the block.
+        """
+        instance = _attached.get(name)
+        if instance is None:
+            instance = _attached[name] = cls(shared_memory.SharedMemory(name=name))
+        return instance
+
+    def construction(self):
+        """The nodes and the efficiency list over the shared arrays.
+
+        They are built on the first call and returned by every later one; the
+        constructions and simulations of the heuristics leave them unchanged.
+
+        Returns:
+            tuple: The alpha value, the nodes (with their depot edges set) and the
+            efficiency list, a `SharedEfficiencyList`.
+        """
+        if self._construction is None:
+            nodes = HeuristicUtils.to_node_list(self.node_list)
+            start, finish = nodes[0], nodes[-1]
+            for node in nodes[1:-1]:
+                node.depot_to_node = Edge(start, node, float(self.distances[0, node.id_]))
+                node.node_to_depot = Edge(node, finish, float(self.distances[node.id_, -1]))
+            self._construction = self.alpha, nodes, SharedEfficiencyList(self, nodes)
+        return self._construction
+
+    def close(self):
+        """Unmap the block from this process."""
+        for key in ("node_list", "distances", "savings", "order", "positions"):
+            self.__dict__.pop(key, None)
+        self._construction = None
+        if _attached.get(self.name) is self:
+            del _attached[self.name]
+        self._block.close()
+
+    def unlink(self):
+        """Close and destroy the block; only the publishing process should call it."""
+        self.close()
+        self._block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
+
+    def __reduce__(self):
+        return self.attach, (self.name,)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: name={self.name}, alpha={self.alpha}"
+
+
+class SharedEfficiencyList(Sequence):
+    """Efficiency list of a `SharedInstance`, with edges built on demand.
+
+    It behaves like the list of `HeuristicUtils.generate_efficiency_list`, but an
+    edge is only built from the shared arrays the first time it is reached, then
+    kept, so later constructions and simulations get the same edge object (and its
+    compiled type and parameters). Copying the list gives the working list of
+    `merge_routes`, a list of positions. It reads the block, so it is only valid
+    while it is mapped.
+    """
+
+    def __init__(self, shared, nodes):
+        self._shared = shared
+        self._nodes = nodes
+        self._edges = [None] * len(shared.order)
+
+    def __len__(self):
+        return len(self._shared.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.edge_at(position) for position in range(len(self))[index]]
+        return self.edge_at(range(len(self))[index])
+
+    def __contains__(self, edge):
+        return self.position(edge.origin.id_, edge.end.id_) >= 0
+
+    def __copy__(self):
+        return _WorkingEfficiencyList(self)
+
+    def position(self, i, j):
+        """Position of the `(i, j)` edge in the list, -1 for depot edges."""
+        return int(self._shared.positions[i, j])
+
+    def edge_at(self, position):
+        edge = self._edges[position]
+        if edge is None:
+            i, j = self._shared.order[position].tolist()
+            edge = self._edges[position] = self._new_edge(i, j)
+        return edge
+
+    def edge(self, i, j):
+        """The `(i, j)` edge, depot edges included."""
+        position = self.position(i, j)
+        if position >= 0:
+            return self.edge_at(position)
+        if i == 0:
+            return self._nodes[j].depot_to_node
+        if j == len(self._nodes) - 1:
+            return self._nodes[i].node_to_depot
+        raise KeyError((i, j))
+
+    def lookup(self):
+        """Map `(origin id, end id)` to the edges, as `HeuristicUtils.edge_lookup`."""
+        return _EdgeLookup(self)
+
+    def _new_edge(self, i, j):
+        i_node, j_node = self._nodes[i], self._nodes[j]
+        alpha = self._shared.alpha
+        savings = float(self._shared.savings[i, j])
+        edge = _SharedEdge(i_node, j_node, float(self._shared.distances[i, j]), savings)
+        edge.efficiency = alpha * savings + (1 - alpha) * (i_node.reward + j_node.reward)
+        edge.efficiency_list = self
+        return edge
+
+
+class _SharedEdge(Edge):
+    # an edge of a `SharedEfficiencyList`, whose inverse is only built if needed
+    efficiency_list = None
+
+    @property
+    def inverse_edge(self):
+        return self.efficiency_list.edge(self.end.id_, self.origin.id_)
+
+
+class _WorkingEfficiencyList:
+    # the mutable copy `merge_routes` pops edges from; only positions are copied
+    def __init__(self, efficiency_list):
+        self._efficiency_list = efficiency_list
+        self._positions = list(range(len(efficiency_list)))
+        # membership by position, without scanning the list
+        self._present = np.ones(len(efficiency_list), dtype=bool)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, edge):
+        position = self._efficiency_list.position(edge.origin.id_, edge.end.id_)
+        return position >= 0 and bool(self._present[position])
+
+    def pop(self, index=-1):
+        position = self._positions.pop(index)
+        self._present[position] = False
+        return self._efficiency_list.edge_at(position)
+
+    def remove(self, edge):
+        position = self._efficiency_list.position(edge.origin.id_, edge.end.id_)
+        self._positions.remove(position)
+        self._present[position] = False
+
+
+class _EdgeLookup:
+    def __init__(self, efficiency_list):
+        self._efficiency_list = efficiency_list
+
+    def __getitem__(self, pair):
+        return self._efficiency_list.edge(*pair)
+
+
+# the blocks this process attached to, by name
+_attached = {}
+
+
+@atexit.register
+def _close_attached():
+    for instance in list(_attached.values()):
+        instance.close()
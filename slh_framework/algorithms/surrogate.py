@@ -0,0 +1,157 @@
+import math
+
+import numpy as np
+
+from slh_framework.simulations.experimental import EdgeType, MonteCarlo
+
+
+class Surrogate:
+    """Online ridge regression that predicts `reward_after` from route features.
+
+    The model is trained on the simulations already run by the heuristic and is used
+    to screen candidates before they are sent to the (expensive) simulation. A
+    candidate is simulated when its optimistic prediction, `prediction + z * rmse`,
+    beats the current best stochastic reward. Until `warm_up` samples have been
+    seen, and then every `explore_every` screened candidates, the candidate is
+    simulated regardless of the prediction so the model keeps being corrected.
+
+    Features (per solution):
+        * deterministic reward
+        * minimum and mean slack ratio, `(route_max_cost - route.cost) / route_max_cost`
+        * slack-weighted reward, `sum(route.reward * slack ratio)`
+        * share of stochastic edges and share of dynamic edges
+
+    Attributes:
+        z (float): Optimism, in residual standard deviations, of the screening rule.
+        warm_up (int): Number of samples simulated before screening starts.
+        explore_every (int): Simulate one out of every `explore_every` candidates
+            that the model would have skipped. 0 disables exploration.
+        ridge (float): L2 regularisation of the regression.
+        edge_type (callable): Maps an `Edge` to an `EdgeType`.
+        simulated (int): Candidates sent to the simulation.
+        skipped (int): Candidates discarded by the model.
+    """
+
+    n_features = 7
+
+    def __init__(
+        self,
+        z=1.0,
+        warm_up=10,
+        explore_every=10,
+        ridge=1e-3,
+        edge_type=MonteCarlo.get_edge_type,
+    ):
+        self.z = z
+        self.warm_up = warm_up
+        self.explore_every = explore_every
+        self.ridge = ridge
+        self.edge_type = edge_type
+        self.simulated = 0
+        self.skipped = 0
+        self._screened = 0
+        # sufficient statistics of the least squares problem
+        self._xtx = np.zeros((self.n_features, self.n_features))
+        self._xty = np.zeros(self.n_features)
+        self._yty = 0.0
+        self._samples = 0
+        self._coef = np.zeros(self.n_features)
+        self._rmse = math.inf
+
+    def features(self, solution, route_max_cost):
+        x = np.zeros(self.n_features)
+        x[0] = 1.0
+        x[1] = solution.reward
+        edges = stochastic = dynamic = 0
+        slacks = []
+        for route in solution.routes:
+            slack = (route_max_cost - route.cost) / route_max_cost if route_max_cost else 0.0
+            slacks.append(slack)
+            x[4] += route.reward * slack
+            for edge in route.edges:
+                edges += 1
+                type_ = self.edge_type(edge)
+                if type_ == EdgeType.STOCHASTIC:
+                    stochastic += 1
+                elif type_ == EdgeType.DYNAMIC:
+                    dynamic += 1
+        if slacks:
+            x[2] = min(slacks)
+            x[3] = sum(slacks) / len(slacks)
+        if edges:
+            x[5] = stochastic / edges
+            x[6] = dynamic / edges
+        return x
+
+    def predict(self, solution, route_max_cost):
+        return float(self.features(solution, route_max_cost) @ self._coef)
+
+    def should_simulate(self, solution, route_max_cost, best_reward_after):
+        """Decide whether `solution` is worth a simulation run."""
+        if self._samples < self.warm_up:
+            self.simulated += 1
+            return True
+        self._screened += 1
+        optimistic = self.predict(solution, route_max_cost) + self.z * self._rmse
+        if optimistic > best_reward_after or (
+            self.explore_every and self._screened % self.explore_every == 0
+        ):
+            self.simulated += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def update(self, solution, route_max_cost):
+        """Add a simulated solution, with its `reward_after`, to the training set."""
+        x = self.features(solution, route_max_cost)
+        y = solution.reward_after
+        self._xtx += np.outer(x, x)
+        self._xty += x * y
+        self._yty += y * y
+        self._samples += 1
+        self._fit()
+
+    def get_state(self):
+        """Return the learned state as arrays, e.g. to be stored in a `Checkpoint`."""
+        return {
+            "surrogate_xtx": self._xtx,
+            "surrogate_xty": self._xty,
+            "surrogate_counters": np.array(
+                [self._yty, self._samples, self._screened, self.simulated, self.skipped]
+            ),
+        }
+
+    def set_state(self, state):
+        """Restore the state returned by `get_state`.
+
+        Raises:
+            ValueError: If `state` holds no surrogate, e.g. the values of a
+                checkpoint written by a run without one.
+        """
+        if "surrogate_xtx" not in state:
+            raise ValueError(
+                "No surrogate state to restore; the checkpoint was written by a run "
+                "without a surrogate, resume it without one"
+            )
+        self._xtx = np.array(state["surrogate_xtx"], dtype=float)
+        self._xty = np.array(state["surrogate_xty"], dtype=float)
+        yty, samples, screened, simulated, skipped = state["surrogate_counters"].tolist()
+        self._yty = yty
+        self._samples, self._screened = int(samples), int(screened)
+        self.simulated, self.skipped = int(simulated), int(skipped)
+        if self._samples:
+            self._fit()
+
+    def _fit(self):
+        regularised = self._xtx + self.ridge * np.eye(self.n_features)
+        self._coef = np.linalg.solve(regularised, self._xty)
+        # residual sum of squares from the sufficient statistics
+        rss = self._yty - 2 * self._coef @ self._xty + self._coef @ self._xtx @ self._coef
+        dof = max(self._samples - self.n_features, 1)
+        self._rmse = math.sqrt(max(rss, 0.0) / dof)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}>: samples={self._samples}, "
+            f"simulated={self.simulated}, skipped={self.skipped}, rmse={self._rmse:.3f}"
+        )
@@ -0,0 +1,282 @@
+import math
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from time import time
+
+import numpy as np
+
+from slh_framework.algorithms.shared import SharedInstance
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.graph import Route
+from slh_framework.simulations.base import Solution
+
+
+def parallel_tempering_heuristic(
+    test_instance,
+    test_data,
+    simulation,
+    chains=4,
+    exchange_every=10,
+    processes=None,
+    shared=None,
+    trace=None,
+    mp_context=None,
+    simulation_class=None,
+):
+    """Replica-exchange simulated annealing over the PJ's initial solution.
+
+    `chains` annealing chains run at fixed temperatures, geometrically spaced from
+    `min_temp` (the coldest chain) to `initial_temp` (the hottest one), each making
+    the moves of `simulated_annealing_heuristic`. As these moves never change the
+    deterministic reward of a solution, chains accept moves on the `reward_after`
+    of `short_sim` runs instead. Every `exchange_every` steps the chains
+    synchronise: the coldest chain continues from the global best solution if it
+    beats its current one, and the current solutions of adjacent temperatures are
+    swapped with the replica-exchange
+    probability `min(1, exp((1 / T_cold - 1 / T_hot) * (reward_hot - reward_cold)))`,
+    alternating between even and odd pairs. Hot chains explore and hand their good
+    solutions down to the cold ones, which refine them.
+
+    Each chain owns its `random` and `numpy.random` states, derived from
+    `test_instance.seed` and carried with it between worker processes, and swaps
+    use a generator seeded with it too. A run is therefore reproducible per seed
+    for a given number of rounds, whatever the number of processes.
+
+    Args:
+        test_instance (TestInstance): Test parameters, including `initial_temp`,
+            `min_temp` and `seed`.
+        test_data (dict): Instance data (fleet size, route max cost and node list).
+        simulation (callable): Simulation used to estimate `reward_after`.
+        chains (int): Number of chains, i.e. of temperatures in the ladder.
+        exchange_every (int): Steps each chain makes between two exchanges.
+        processes (int, optional): Worker processes, one per chain (up to the number
+            of cores) by default. 0 runs every chain in this process.
+        shared (SharedInstance, optional): Published construction of the instance;
+            one is published for the run by default.
+        trace (Trace, optional): Records every improvement of the global best and the
+            progress after every exchange round: `reward_after` of the coldest chain
+            and of the best solution, swap acceptance rate (`value`) and swaps
+            accepted (`count`).
+        mp_context (optional): Multiprocessing context of the worker pool.
+        simulation_class (type, optional): Class of `simulation`, whose
+            `condition_factors`, `sampler`, `uncertainty_model` and
+            `edge_type_policy` are passed on to the worker processes. Needed when
+            they do not inherit them, e.g. with a "spawn" `mp_context`.
+
+    Returns:
+        Solution: The best solution found, simulated `long_sim` times.
+    """
+    fleet_size = test_data["fleet_size"]
+    route_max_cost = test_data["route_max_cost"]
+    temperatures = np.geomspace(test_instance.initial_temp, test_instance.min_temp, chains)
+    if processes is None:
+        processes = min(chains, os.cpu_count() or 1)
+
+    with SharedInstance.publish(test_data) if shared is None else nullcontext(shared) as shared:
+        _, nodes, efficiency_list = shared.construction()
+        lookup = HeuristicUtils.edge_lookup(nodes, efficiency_list)
+        initial_solution = HeuristicUtils.merge_routes(
+            test_data, fleet_size, route_max_cost, nodes, efficiency_list
+        )
+        # every chain simulates the initial solution with its own generators
+        initial_solution.reward_after = math.nan
+        initial_solution = _pack(initial_solution)
+        swap_random = random.Random(test_instance.seed)
+        states = []
+        for temperature, sequence in zip(
+            temperatures[::-1].tolist(), np.random.SeedSequence(test_instance.seed).spawn(chains)
+        ):
+            python_seed, numpy_seed = sequence.generate_state(2).tolist()
+            states.append(
+                {
+                    "temperature": temperature,
+                    "current": initial_solution,
+                    "best": None,
+                    "python_rng": random.Random(python_seed).getstate(),
+                    "numpy_rng": np.random.RandomState(numpy_seed).get_state(),
+                }
+            )
+        best = None
+
+        if processes:
+            settings = {
+                name: getattr(simulation_class, name)
+                for name in _SIMULATION_SETTINGS
+                if hasattr(simulation_class, name)
+            }
+            initargs = (shared, test_instance, test_data, simulation, simulation_class, settings)
+            executor = ProcessPoolExecutor(
+                processes, mp_context=mp_context, initializer=_initialize_worker, initargs=initargs
+            )
+        else:
+            # the chains take over the random number generators of this process
+            executor = nullcontext()
+            python_state, numpy_state = random.getstate(), np.random.get_state()
+            context = _chain_context(shared, test_instance, test_data, simulation)
+
+        def run_chains(states):
+            if processes:
+                return list(executor.map(_run_worker_chain, states, [exchange_every] * chains))
+            return [_run_chain(state, exchange_every, context) for state in states]
+
+        with executor:
+            rounds, swaps, accepted_swaps = 0, 0, 0
+            elapsed = 0
+            start_time = time()
+            while elapsed < test_instance.max_time:
+                states = run_chains(states)
+                # share the global best
+                previous_best = best
+                for state in states:
+                    if best is None or _reward(state["best"]) > _reward(best):
+                        best = state["best"]
+                if trace is not None and best is not previous_best:
+                    trace.record(
+                        trace.BEST, elapsed, rounds * exchange_every, best[0][1], _reward(best)
+                    )
+                # the coldest chain refines the global best
+                if _reward(best) > _reward(states[0]["current"]):
+                    states[0]["current"] = best
+                # exchange the current solutions of adjacent temperatures
+                for cold in range(rounds % 2, chains - 1, 2):
+                    cold_state, hot_state = states[cold], states[cold + 1]
+                    delta = _reward(hot_state["current"]) - _reward(cold_state["current"])
+                    exponent = (1 / cold_state["temperature"] - 1 / hot_state["temperature"]) * delta
+                    swaps += 1
+                    if exponent >= 0 or swap_random.random() < math.exp(exponent):
+                        cold_state["current"], hot_state["current"] = (
+                            hot_state["current"],
+                            cold_state["current"],
+                        )
+                        accepted_swaps += 1
+                rounds += 1
+                elapsed = time() - start_time
+                if trace is not None:
+                    trace.record(
+                        trace.SAMPLE,
+                        elapsed,
+                        rounds * exchange_every,
+                        _reward(states[0]["current"]),
+                        _reward(best),
+                        accepted_swaps / swaps if swaps else np.nan,
+                        accepted_swaps,
+                    )
+
+        if not processes:
+            random.setstate(python_state)
+            np.random.set_state(numpy_state)
+        best_solution = _unpack(best, lookup)
+
+    simulation(best_solution, test_instance.long_sim, route_max_cost, test_instance.var_level)
+    if trace is not None:
+        trace.record(
+            trace.FINAL,
+            elapsed,
+            rounds * exchange_every,
+            best_solution.reward,
+            _reward(best),
+            best_solution.reward_after,
+            accepted_swaps,
+        )
+    return best_solution
+
+
+# solutions travel between processes as plain tuples of edge ids and values, and
+# are rebuilt against the construction of each process
+def _pack(solution):
+    return (
+        (solution.cost, solution.reward, solution.reward_after),
+        tuple(
+            (route.cost, route.reward, tuple((e.origin.id_, e.end.id_) for e in route.edges))
+            for route in solution.routes
+        ),
+    )
+
+
+def _reward(packed):
+    return packed[0][2]
+
+
+def _unpack(packed, lookup):
+    (cost, reward, reward_after), routes = packed
+    solution = Solution(cost=cost, reward=reward, reward_after=reward_after)
+    for route_cost, route_reward, edges in routes:
+        route = Route(cost=route_cost, reward=route_reward)
+        route.edges = [lookup[pair] for pair in edges]
+        solution.routes.append(route)
+    return solution
+
+
+def _chain_context(shared, test_instance, test_data, simulation):
+    _, nodes, efficiency_list = shared.construction()
+    return {
+        "test_instance": test_instance,
+        "fleet_size": test_data["fleet_size"],
+        "route_max_cost": test_data["route_max_cost"],
+        "nodes": nodes,
+        "efficiency_list": efficiency_list,
+        "lookup": HeuristicUtils.edge_lookup(nodes, efficiency_list),
+        "simulation": simulation,
+    }
+
+
+# context of the chains run by a worker process, set by its pool initializer
+_worker_context = {}
+
+
+# class attributes of the simulation a worker process takes over from the parent
+_SIMULATION_SETTINGS = ("condition_factors", "sampler", "uncertainty_model", "edge_type_policy")
+
+
+def _initialize_worker(shared, test_instance, test_data, simulation, simulation_class, settings):
+    for name, value in settings.items():
+        setattr(simulation_class, name, value)
+    _worker_context.update(_chain_context(shared, test_instance, test_data, simulation))
+
+
+def _run_worker_chain(state, steps):
+    return _run_chain(state, steps, _worker_context)
+
+
+def _run_chain(state, steps, context):
+    test_instance = context["test_instance"]
+    route_max_cost = context["route_max_cost"]
+    temperature = state["temperature"]
+    simulation = context["simulation"]
+    current_solution = _unpack(state["current"], context["lookup"])
+    best = state["best"]
+    best_reward = -math.inf if best is None else _reward(best)
+
+    random.setstate(state["python_rng"])
+    np.random.set_state(state["numpy_rng"])
+    if math.isnan(current_solution.reward_after):
+        simulation(current_solution, test_instance.short_sim, route_max_cost, test_instance.var_level)
+    if current_solution.reward_after > best_reward:
+        best_reward = current_solution.reward_after
+        best = _pack(current_solution)
+    for _ in range(steps):
+        new_solution = HeuristicUtils.modify_solution(
+            current_solution,
+            context["fleet_size"],
+            route_max_cost,
+            context["nodes"],
+            context["efficiency_list"],
+        )
+        simulation(new_solution, test_instance.short_sim, route_max_cost, test_instance.var_level)
+        delta_reward = new_solution.reward_after - current_solution.reward_after
+        if delta_reward > 0 or random.uniform(0, 1) < math.exp(delta_reward / temperature):
+            current_solution = new_solution
+            if new_solution.reward_after > best_reward:
+                best_reward = new_solution.reward_after
+                best = _pack(new_solution)
+
+    return {
+        **state,
+        "current": _pack(current_solution),
+        "best": best,
+        "python_rng": random.getstate(),
+        "numpy_rng": np.random.get_state(),
+    }
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+class Trace:
+    """Convergence trace of a heuristic run, kept in preallocated ring buffers.
+
+    Every event is written in place into one NumPy array per column, so recording
+    allocates no Python objects per event. Once `capacity` events have been
+    recorded, the oldest ones are overwritten; `dropped` counts them. The trace is
+    exported column by column into a compressed `.npz` file.
+
+    Columns:
+        * time: seconds of search when the event was recorded
+        * iteration: heuristic iteration of the event
+        * event: event code, see `events`
+        * reward: OBD reward (pj) or current solution reward (SA)
+        * reward_after: OBS `reward_after` (pj) or best reward (SA)
+        * value: temperature of an SA step, `reward_after` of a new SA best
+          solution, OBS reward of the final event of pj
+        * count: candidates simulated so far (pj) or 1 if the SA move was accepted
+
+    Attributes:
+        capacity (int): Number of events kept.
+        sample_every (int): Iterations between two `SAMPLE` events of `pj_heuristic`.
+        recorded (int): Number of events recorded, dropped ones included.
+    """
+
+    SAMPLE, OBD, OBS, STEP, BEST, FINAL = range(6)
+    events = {
+        SAMPLE: "sample",
+        OBD: "obd",
+        OBS: "obs",
+        STEP: "step",
+        BEST: "best",
+        FINAL: "final",
+    }
+    columns = {
+        "time": np.float64,
+        "iteration": np.int64,
+        "event": np.int8,
+        "reward": np.float64,
+        "reward_after": np.float64,
+        "value": np.float64,
+        "count": np.int64,
+    }
+
+    def __init__(self, capacity=65536, sample_every=100):
+        self.capacity = int(capacity)
+        self.sample_every = int(sample_every)
+        self.recorded = 0
+        self._buffers = {
+            name: np.zeros(self.capacity, dtype=dtype) for name, dtype in self.columns.items()
+        }
+        # bound once, `record` runs inside the heuristic loops
+        self._time = self._buffers["time"]
+        self._iteration = self._buffers["iteration"]
+        self._event = self._buffers["event"]
+        self._reward = self._buffers["reward"]
+        self._reward_after = self._buffers["reward_after"]
+        self._value = self._buffers["value"]
+        self._count = self._buffers["count"]
+
+    @property
+    def dropped(self):
+        return max(0, self.recorded - self.capacity)
+
+    def __len__(self):
+        return min(self.recorded, self.capacity)
+
+    def record(self, event, time, iteration, reward, reward_after, value=np.nan, count=0):
+        index = self.recorded % self.capacity
+        self._time[index] = time
+        self._iteration[index] = iteration
+        self._event[index] = event
+        self._reward[index] = reward
+        self._reward_after[index] = reward_after
+        self._value[index] = value
+        self._count[index] = count
+        self.recorded += 1
+
+    def to_arrays(self):
+        """Return the kept events column by column, oldest first."""
+        start = self.recorded % self.capacity if self.dropped else 0
+        order = np.roll(np.arange(len(self)), -start)
+        return {name: buffer[order] for name, buffer in self._buffers.items()}
+
+    def save(self, path):
+        """Write the trace as a compressed `.npz` file with one array per column."""
+        np.savez_compressed(
+            path,
+            **self.to_arrays(),
+            event_names=np.array([self.events[code] for code in sorted(self.events)]),
+            dropped=np.array(self.dropped),
+        )
+
+    @staticmethod
+    def load(path):
+        """Read a saved trace back as a dict of columns."""
+        with np.load(path) as data:
+            return dict(data)
+
+    def summary(self):
+        """Aggregate figures of the kept events.
+
+        Returns:
+            dict: Duration, iterations per second, time of the last improvement of
+            the best solution, the SA acceptance rate and the number of events of
+            each kind.
+        """
+        columns = self.to_arrays()
+        time, iteration, event = columns["time"], columns["iteration"], columns["event"]
+        duration = float(time[-1] - time[0]) if len(time) else 0.0
+        improvements = np.isin(event, (self.OBD, self.OBS, self.BEST))
+        steps = event == self.STEP
+        return {
+            "duration": duration,
+            "iterations_per_second": (
+                float(iteration[-1] - iteration[0]) / duration if duration > 0 else np.nan
+            ),
+            "time_to_best": float(time[improvements][-1]) if improvements.any() else np.nan,
+            "acceptance_rate": float(columns["count"][steps].mean()) if steps.any() else np.nan,
+            "events": {name: int(np.sum(event == code)) for code, name in self.events.items()},
+        }
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: recorded={self.recorded}, dropped={self.dropped}"
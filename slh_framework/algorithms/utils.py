@@ -5,7 +5,7 @@ import time
 
 import numpy as np
 
-from copy import copy, deepcopy
+from copy import copy
 from slh_framework.simulations.base import Solution
 from slh_framework.graph import Node, Edge, Route
 
@@ -28,77 +28,158 @@ def timeit(func):
 class HeuristicUtils:
     @staticmethod
     def to_node_list(list_):
-        return [Node(index, *data) for index, data in enumerate(list_)]
+        # array-backed node lists are turned into Python floats, which are much
+        # cheaper than NumPy scalars inside the pure-Python heuristic loops
+        rows = list_.tolist() if isinstance(list_, np.ndarray) else list_
+        return [Node(index, *data) for index, data in enumerate(rows)]
 
     @staticmethod
-    def generate_initial_solution(test, fleet_size, route_max_cost, nodes):
-        def generate_efficiency_list(nodes, alpha):
-            start = nodes[0]
-            finish = nodes[-1]
-            for node in nodes[1:-1]:  # excludes the start and finish depots
-                sn_edge = Edge(start, node)  # creates the (start, node) edge (arc)
-                nf_edge = Edge(node, finish)  # creates the (node, finish) edge (arc)
+    def generate_efficiency_list(nodes, alpha):
+        start = nodes[0]
+        finish = nodes[-1]
+        for node in nodes[1:-1]:  # excludes the start and finish depots
+            sn_edge = Edge(start, node)  # creates the (start, node) edge (arc)
+            nf_edge = Edge(node, finish)  # creates the (node, finish) edge (arc)
+            # compute the Euclidean distance as cost
+            sn_edge.cost = euclidean(start.x, node.x, start.y, node.y)
+            nf_edge.cost = euclidean(finish.x, node.x, finish.y, node.y)
+            # save in node a reference to the (depot, node) edge (arc)
+            node.depot_to_node = sn_edge
+            node.node_to_depot = nf_edge
+
+        efficiency_list = []
+        for i in range(1, len(nodes) - 2):  # excludes the start and finish depots
+            i_node = nodes[i]
+            for j in range(i + 1, len(nodes) - 1):
+                j_node = nodes[j]
+                ij_edge = Edge(i_node, j_node)  # creates the (i, j) edge
+                ji_edge = Edge(j_node, i_node)
+                ij_edge.inverse_edge = ji_edge  # sets the inverse edge (arc)
+                ji_edge.inverse_edge = ij_edge
                 # compute the Euclidean distance as cost
-                sn_edge.cost = euclidean(start.x, node.x, start.y, node.y)
-                nf_edge.cost = euclidean(finish.x, node.x, finish.y, node.y)
-                # save in node a reference to the (depot, node) edge (arc)
-                node.depot_to_node = sn_edge
-                node.node_to_depot = nf_edge
-
-            efficiency_list = []
-            for i in range(1, len(nodes) - 2):  # excludes the start and finish depots
-                i_node = nodes[i]
-                for j in range(i + 1, len(nodes) - 1):
-                    j_node = nodes[j]
-                    ij_edge = Edge(i_node, j_node)  # creates the (i, j) edge
-                    ji_edge = Edge(j_node, i_node)
-                    ij_edge.inverse_edge = ji_edge  # sets the inverse edge (arc)
-                    ji_edge.inverse_edge = ij_edge
-                    # compute the Euclidean distance as cost
-                    ij_edge.cost = euclidean(i_node.x, j_node.x, i_node.y, j_node.y)
-                    ji_edge.cost = ij_edge.cost  # assume symmetric costs
-                    # compute efficiency as proposed by Panadero et al.(2020)
-                    ij_savings = (
-                        i_node.node_to_depot.cost
-                        + j_node.depot_to_node.cost
-                        - ij_edge.cost
-                    )
-                    edge_reward = i_node.reward + j_node.reward
-                    ij_edge.savings = ij_savings
-                    ij_edge.efficiency = alpha * ij_savings + (1 - alpha) * edge_reward
-                    ji_savings = (
-                        j_node.node_to_depot.cost
-                        + i_node.depot_to_node.cost
-                        - ji_edge.cost
-                    )
-                    ji_edge.savings = ji_savings
-                    ji_edge.efficiency = alpha * ji_savings + (1 - alpha) * edge_reward
-                    # save both edges in the efficiency list
-                    efficiency_list.append(ij_edge)
-                    efficiency_list.append(ji_edge)
-
-            # sort the list of edges from higher to lower efficiency
-            efficiency_list.sort(key=operator.attrgetter("efficiency"), reverse=True)
-            return efficiency_list
+                ij_edge.cost = euclidean(i_node.x, j_node.x, i_node.y, j_node.y)
+                ji_edge.cost = ij_edge.cost  # assume symmetric costs
+                # compute efficiency as proposed by Panadero et al.(2020)
+                ij_savings = (
+                    i_node.node_to_depot.cost
+                    + j_node.depot_to_node.cost
+                    - ij_edge.cost
+                )
+                edge_reward = i_node.reward + j_node.reward
+                ij_edge.savings = ij_savings
+                ij_edge.efficiency = alpha * ij_savings + (1 - alpha) * edge_reward
+                ji_savings = (
+                    j_node.node_to_depot.cost
+                    + i_node.depot_to_node.cost
+                    - ji_edge.cost
+                )
+                ji_edge.savings = ji_savings
+                ji_edge.efficiency = alpha * ji_savings + (1 - alpha) * edge_reward
+                # save both edges in the efficiency list
+                efficiency_list.append(ij_edge)
+                efficiency_list.append(ji_edge)
+
+        # sort the list of edges from higher to lower efficiency
+        efficiency_list.sort(key=operator.attrgetter("efficiency"), reverse=True)
+        return efficiency_list
+
+    @staticmethod
+    def rebuild_efficiency_list(nodes, alpha, order, costs, savings, depot_costs):
+        """Rebuild the edges of a construction from stored values, without sorting.
+
+        Args:
+            nodes (list): The nodes; their depot edges are set.
+            alpha (float): The alpha value of the efficiency list.
+            order (list): `(origin id, end id)` of the edges, from higher to lower efficiency.
+            costs (list): The cost of each edge of `order`.
+            savings (list): The savings of each edge of `order`.
+            depot_costs (list): `(start to node, node to finish)` costs of the nodes
+                between the depots.
+
+        Returns:
+            list: The efficiency list, as built by `generate_efficiency_list`.
+        """
+        start, finish = nodes[0], nodes[-1]
+        for node, (sn_cost, nf_cost) in zip(nodes[1:-1], depot_costs):
+            node.depot_to_node = Edge(start, node, sn_cost)
+            node.node_to_depot = Edge(node, finish, nf_cost)
+
+        edges = {}
+        efficiency_list = []
+        for (i, j), cost, edge_savings in zip(order, costs, savings):
+            i_node, j_node = nodes[i], nodes[j]
+            edge = Edge(i_node, j_node, cost, edge_savings)
+            edge.efficiency = alpha * edge_savings + (1 - alpha) * (i_node.reward + j_node.reward)
+            inverse_edge = edges.pop((j, i), None)
+            if inverse_edge is None:
+                edges[(i, j)] = edge
+            else:
+                edge.inverse_edge = inverse_edge
+                inverse_edge.inverse_edge = edge
+            efficiency_list.append(edge)
+        return efficiency_list
+
+    @staticmethod
+    def generate_initial_construction(test, fleet_size, route_max_cost, nodes, alphas=None):
+        """Sweep alpha and keep the efficiency list giving the best initial solution.
+
+        Args:
+            alphas (iterable, optional): The alpha values to try, 0 to 1 by steps of
+                0.1 by default.
 
+        Returns:
+            tuple: The chosen alpha, its efficiency list and the initial solution.
+        """
+        if alphas is None:
+            alphas = np.linspace(0, 1, 11)
         best_reward = 0
-        efficiency_list, initial_solution = None, None
-        for alpha in np.linspace(0, 1, 11):
-            new_efficiency_list = generate_efficiency_list(nodes, alpha)
+        best_alpha, efficiency_list, initial_solution = None, None, None
+        for alpha in alphas:
+            new_efficiency_list = HeuristicUtils.generate_efficiency_list(nodes, alpha)
             solution = HeuristicUtils.merge_routes(
                 test, fleet_size, route_max_cost, nodes, new_efficiency_list
             )
             if solution.reward > best_reward:
                 best_reward = solution.reward
+                best_alpha = float(alpha)
                 efficiency_list = new_efficiency_list
                 initial_solution = solution
 
+        return best_alpha, efficiency_list, initial_solution
+
+    @staticmethod
+    def generate_initial_solution(test, fleet_size, route_max_cost, nodes):
+        _, efficiency_list, initial_solution = HeuristicUtils.generate_initial_construction(
+            test, fleet_size, route_max_cost, nodes
+        )
         return efficiency_list, initial_solution
 
+    @staticmethod
+    def edge_lookup(nodes, efficiency_list):
+        """Map `(origin id, end id)` to the edges of a construction, depot edges included."""
+        if hasattr(efficiency_list, "lookup"):
+            # a `SharedEfficiencyList` builds the edges on demand
+            return efficiency_list.lookup()
+        lookup = {(edge.origin.id_, edge.end.id_): edge for edge in efficiency_list}
+        for node in nodes[1:-1]:
+            for edge in (node.depot_to_node, node.node_to_depot):
+                lookup[(edge.origin.id_, edge.end.id_)] = edge
+        return lookup
+
     @staticmethod
     def modify_solution(current_solution, fleet_size, route_max_cost, nodes, efficiency_list):
-        new_solution = deepcopy(current_solution)
-        
+        # constructed solutions share no state with the nodes, so copying the
+        # route lists is enough; nodes and edges are never modified
+        new_solution = Solution(
+            cost=current_solution.cost,
+            reward=current_solution.reward,
+            reward_after=current_solution.reward_after,
+        )
+        for current_route in current_solution.routes:
+            route = Route(cost=current_route.cost, reward=current_route.reward)
+            route.edges = list(current_route.edges)
+            new_solution.routes.append(route)
+
         # select a route to modify
         route_index = random.randint(0, len(new_solution.routes) - 1)
         route = new_solution.routes[route_index]
@@ -140,19 +221,28 @@ class HeuristicUtils:
     def merge_routes(
         test, fleet_size, route_max_cost, nodes, efficiency_list_, br=False
     ):
+        """Merge the dummy routes of `nodes` along the edges of the efficiency list.
+
+        The construction state (the route of every node and whether it is still
+        linked to the depots) lives in lists local to the call, indexed by node id;
+        nodes, edges and the efficiency list are only read. The returned solution
+        owns its routes, so constructions can run concurrently (e.g. in a thread
+        pool) and never alter the solutions returned before.
+        """
+
         def can_merge(i_node, j_node, i_route, j_route, ij_edge, route_max_cost):
-            if i_route == j_route:
+            if i_route is j_route:
                 return False
-            if (
-                i_node.is_linked_to_finish is False
-                or j_node.is_linked_to_start is False
-            ):
+            if not linked_to_finish[i_node.id_] or not linked_to_start[j_node.id_]:
                 return False
             if i_route.cost + j_route.cost - ij_edge.savings > route_max_cost:
                 return False
             return True
 
-        solution = HeuristicUtils.dummy_solution(route_max_cost, nodes)
+        solution, in_route = HeuristicUtils._dummy_routes(route_max_cost, nodes)
+        # every node starts linked to both depots
+        linked_to_start = [True] * len(nodes)
+        linked_to_finish = [True] * len(nodes)
         efficiency_list = copy(efficiency_list_)
         while len(efficiency_list) > 0:
             position = (
@@ -165,8 +255,8 @@ class HeuristicUtils:
             ij_edge = efficiency_list.pop(position)
             i_node = ij_edge.origin
             j_node = ij_edge.end
-            i_route = i_node.in_route
-            j_route = j_node.in_route
+            i_route = in_route[i_node.id_]
+            j_route = in_route[j_node.id_]
             if can_merge(i_node, j_node, i_route, j_route, ij_edge, route_max_cost):
                 ji_edge = ij_edge.inverse_edge
                 if ji_edge in efficiency_list:
@@ -174,22 +264,22 @@ class HeuristicUtils:
                 i_edge = i_route.edges[-1]
                 i_route.edges.remove(i_edge)
                 i_route.cost -= i_edge.cost
-                i_node.is_linked_to_finish = False
+                linked_to_finish[i_node.id_] = False
                 j_edge = j_route.edges[0]
                 j_route.edges.remove(j_edge)
                 j_route.cost -= j_edge.cost
-                j_node.is_linked_to_start = False
+                linked_to_start[j_node.id_] = False
                 # add ij_edge to i_route
                 i_route.edges.append(ij_edge)
                 i_route.cost += ij_edge.cost
                 i_route.reward += j_node.reward
-                j_node.in_route = i_route
+                in_route[j_node.id_] = i_route
                 # add j_route to new i_route
                 for edge in j_route.edges:
                     i_route.edges.append(edge)
                     i_route.cost += edge.cost
                     i_route.reward += edge.end.reward
-                    edge.end.in_route = i_route
+                    in_route[edge.end.id_] = i_route
                 # delete j_route from emerging solution
                 solution.cost -= ij_edge.savings
                 solution.routes.remove(j_route)
@@ -203,7 +293,15 @@ class HeuristicUtils:
 
     @staticmethod
     def dummy_solution(route_max_cost, nodes):
+        """One route start -> node -> finish per node, for the routes within `route_max_cost`."""
+        return HeuristicUtils._dummy_routes(route_max_cost, nodes)[0]
+
+    @staticmethod
+    def _dummy_routes(route_max_cost, nodes):
+        # also returns the route of every node (indexed by node id), including the
+        # routes left out of the solution
         solution = Solution()
+        in_route = [None] * len(nodes)
         # iterate all nodes except for start and finish depots
         for node in nodes[1:-1]:
             sn_edge = node.depot_to_node
@@ -215,12 +313,11 @@ class HeuristicUtils:
             route.cost += sn_edge.cost
             route.edges.append(nf_edge)
             route.cost += nf_edge.cost
-            node.in_route = route
-            node.is_linked_to_start, node.is_linked_to_finish = True, True
+            in_route[node.id_] = route
 
             if route.cost <= route_max_cost:
                 solution.routes.append(route)
                 solution.cost += route.cost
                 solution.reward += route.reward
 
-        return solution
+        return solution, in_route
@@ -2,53 +2,18 @@ import os
 
 from random import randint
 
+from ._parsers import (
+    NumpyTxtParser,
+    TsplibParser,
+    TxtFileParser,
+    extensions,
+    get_parser,
+    parsers,
+    register_parser,
+)
 
-SEED_SIZE = 7
-
-
-class TxtFileParser:
-    meta = {
-        "n": ("number_of_nodes", int),
-        "m": ("fleet_size", int),
-        "tmax": ("route_max_cost", float),
-    }
-
-    def __init__(self, filepath):
-        self.filepath = filepath
-        self.data = {}
-
-    def parse_file(self):
-        """Read the file and parse each line using parse_line method."""
-        nodes = []
-        with open(self.filepath, "r") as file:
-            for line in file:
-                key, value = self.parse_line(line)
-                if key and value:  # Ensure that both key and value are not None
-                    # check for metadata values
-                    if key in self.meta:
-                        key_name, key_type = self.meta[key]
-                        self.data[key_name] = key_type(value)
-                    else:
-                        # it's a node
-                        nodes.append(tuple([float(x) for x in line.split(";")]))
-        self.data["node_list"] = nodes
 
-    def parse_line(self, line, separator=";"):
-        """Parse individual lines; can be overridden for specialized line types."""
-        line = line.strip()
-        if line:
-            parts = line.split(separator, 1)
-            if len(parts) == 2:
-                key = parts[0].strip()
-                value = parts[1].strip()
-                return key, value
-        return None, None  # Return None if the line doesn't match the expected format
-
-    def __repr__(self):
-        return f"<{self.__class__.__name__} ({self.filepath})>: {self.data}"
-
-
-SelectedParser = os.getenv("parser", TxtFileParser)
+SEED_SIZE = 7
 
 
 class TestInstance:
@@ -65,6 +30,8 @@ class TestInstance:
         long_sim (int): The number of runs in a long simulation.
         var_level (float): The variance level.
         filename (str): The filepath of the test instance.
+        parser (str): The registered parser name; by default it is picked from the
+            `parser` environment variable or the file extension.
     """
 
     def __init__(
@@ -78,6 +45,7 @@ class TestInstance:
         long_sim=1000,
         var_level=1.0,
         filename=None,
+        parser=None,
     ):
         self.instance_name = instance_name
         self.max_time = int(max_time)
@@ -98,10 +66,10 @@ class TestInstance:
             "node_list": [],
         }
         if filename is not None:
-            file_parser = SelectedParser(filename)
+            file_parser = get_parser(filename, parser)(filename)
             file_parser.parse_file()
             self.instance_data = file_parser.data
-            self.instance_name = filename.split(os.path.sep)[-1].split(".txt")[0]
+            self.instance_name = os.path.splitext(os.path.basename(filename))[0]
 
     def __repr__(self):
         return f"<{self.__class__.__name__}>: {self.__dict__}"
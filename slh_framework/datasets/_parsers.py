@@ -0,0 +1,192 @@
+import os
+
+import numpy as np
+
+
+class TxtFileParser:
+    meta = {
+        "n": ("number_of_nodes", int),
+        "m": ("fleet_size", int),
+        "tmax": ("route_max_cost", float),
+    }
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.data = {}
+
+    def parse_file(self):
+        """Read the file and parse each line using parse_line method."""
+        nodes = []
+        with open(self.filepath, "r") as file:
+            for line in file:
+                key, value = self.parse_line(line)
+                if key and value:  # Ensure that both key and value are not None
+                    # check for metadata values
+                    if key in self.meta:
+                        key_name, key_type = self.meta[key]
+                        self.data[key_name] = key_type(value)
+                    else:
+                        # it's a node
+                        nodes.append(tuple([float(x) for x in line.split(";")]))
+        self.data["node_list"] = nodes
+
+    def parse_line(self, line, separator=";"):
+        """Parse individual lines; can be overridden for specialized line types."""
+        line = line.strip()
+        if line:
+            parts = line.split(separator, 1)
+            if len(parts) == 2:
+                key = parts[0].strip()
+                value = parts[1].strip()
+                return key, value
+        return None, None  # Return None if the line doesn't match the expected format
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({self.filepath})>: {self.data}"
+
+
+class NumpyTxtParser(TxtFileParser):
+    """Bulk reader for the `n;/m;/tmax;` + `x;y;reward` format.
+
+    The metadata header is read line by line, then the node block is handed in one
+    pass to `np.loadtxt`, which streams the file in chunks and never builds per-line
+    tuples. `node_list` is an (n, 3) float array; any extra columns found in the node
+    block (e.g. `p3.4.k_LD`) are kept apart in `node_attributes`.
+    """
+
+    separator = ";"
+
+    def parse_file(self):
+        with open(self.filepath, "r") as file:
+            while True:
+                position = file.tell()
+                line = file.readline()
+                if not line:
+                    break
+                key, value = self.parse_line(line, self.separator)
+                if key is None:
+                    continue  # blank line
+                if key not in self.meta:
+                    # first node line: rewind and read the whole block at once
+                    file.seek(position)
+                    break
+                key_name, key_type = self.meta[key]
+                self.data[key_name] = key_type(value)
+            table = np.loadtxt(file, delimiter=self.separator, ndmin=2)
+        if table.size == 0:
+            table = np.empty((0, 3))
+        self.data["node_list"] = np.ascontiguousarray(table[:, :3])
+        if table.shape[1] > 3:
+            self.data["node_attributes"] = np.ascontiguousarray(table[:, 3:])
+
+
+class TsplibParser(TxtFileParser):
+    """Reader for TSPLIB-style orienteering (OP/TOP) instances.
+
+    Recognised specification keywords are `DIMENSION`, `COST_LIMIT` (or `TMAX`) and
+    `VEHICLES`; `NODE_COORD_SECTION`, `NODE_SCORE_SECTION` and `DEPOT_SECTION` are
+    read with `np.loadtxt` straight from the open file. TSPLIB tours are closed, so
+    the depot is placed first and repeated last to match the start/finish depot
+    convention used by the heuristics. Only `EUC_2D` edge weights are supported.
+    """
+
+    meta = {
+        "DIMENSION": ("dimension", int),
+        "COST_LIMIT": ("route_max_cost", float),
+        "TMAX": ("route_max_cost", float),
+        "VEHICLES": ("fleet_size", int),
+        "EDGE_WEIGHT_TYPE": ("edge_weight_type", str),
+        "NAME": ("name", str),
+    }
+
+    def parse_file(self):
+        coords = scores = None
+        depot = 0
+        with open(self.filepath, "r") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                section = line.split()[0].rstrip(":").upper()
+                if section == "EOF":
+                    break
+                if section == "NODE_COORD_SECTION":
+                    coords = self._read_section(file, self.data["dimension"], 3)
+                elif section == "NODE_SCORE_SECTION":
+                    scores = self._read_section(file, self.data["dimension"], 2)
+                elif section == "DEPOT_SECTION":
+                    depot = int(file.readline().split()[0]) - 1
+                    file.readline()  # -1 terminator
+                else:
+                    key, value = self.parse_line(line, ":")
+                    if key is not None and key.upper() in self.meta:
+                        key_name, key_type = self.meta[key.upper()]
+                        self.data[key_name] = key_type(value)
+
+        edge_weight_type = self.data.pop("edge_weight_type", "EUC_2D")
+        if edge_weight_type != "EUC_2D":
+            raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE {edge_weight_type!r}")
+        if coords is None:
+            raise ValueError(f"{self.filepath} has no NODE_COORD_SECTION")
+
+        dimension = self.data.pop("dimension")
+        rewards = np.zeros(dimension)
+        if scores is not None:
+            rewards[scores[:, 0].astype(int) - 1] = scores[:, 1]
+        order = coords[:, 0].astype(int) - 1
+        table = np.empty((dimension, 3))
+        table[order, :2] = coords[:, 1:]
+        table[:, 2] = rewards
+        table[depot, 2] = 0.0
+        others = np.delete(np.arange(dimension), depot)
+        index = np.concatenate(([depot], others, [depot]))
+
+        self.data["node_list"] = table[index]
+        self.data["number_of_nodes"] = len(index)
+        self.data.setdefault("fleet_size", 1)
+        self.data.setdefault("route_max_cost", 0.0)
+
+    @staticmethod
+    def _read_section(file, rows, columns):
+        return np.loadtxt(file, max_rows=rows, ndmin=2, usecols=range(columns))
+
+
+parsers = {
+    "txt": NumpyTxtParser,
+    "legacy_txt": TxtFileParser,
+    "tsplib": TsplibParser,
+}
+
+extensions = {
+    ".txt": "txt",
+    ".op": "tsplib",
+    ".top": "tsplib",
+    ".tsp": "tsplib",
+}
+
+
+def register_parser(name, parser, *file_extensions):
+    """Make `parser` selectable by `name` and, optionally, by file extension."""
+    parsers[name] = parser
+    for extension in file_extensions:
+        extensions[extension.lower()] = name
+
+
+def get_parser(filepath, name=None):
+    """Return the parser class for `filepath`.
+
+    The parser is looked up by `name`, then by the `parser` environment variable and
+    finally by the file extension.
+
+    Raises:
+        ValueError: If no registered parser matches.
+    """
+    name = name or os.getenv("parser")
+    if name is None:
+        extension = os.path.splitext(filepath)[1].lower()
+        name = extensions.get(extension)
+        if name is None:
+            raise ValueError(f"No parser registered for extension {extension!r}")
+    if name not in parsers:
+        raise ValueError(f"Unknown parser {name!r}, choose one of {list(parsers)}")
+    return parsers[name]
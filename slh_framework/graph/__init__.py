@@ -1,3 +1,4 @@
 from ._graph import Node, Edge, Route
+from .rendering import Renderer, draw_solution
 
-__all__ = [Node, Edge, Route]
+__all__ = [Node, Edge, Route, Renderer, draw_solution]
@@ -1,6 +1,3 @@
-import networkx as nx
-import matplotlib.pyplot as plt
-
 from dataclasses import dataclass
 
 
@@ -13,20 +10,14 @@ class Node:
         x (float): The euclidean x-coordinate of the node.
         y (float): The euclidean y-coordinate of the node.
         reward (float): The reward associated with the node.
-        in_route (Route): The route to which the node belongs.
         depot_to_node_edge (Edge): The arc from the start depot to this node.
         node_to_depot_edge (Edge): The arc from this node to the finish depot.
-        is_linked_to_start (bool): Indicates whether the node is linked to the start depot.
-        is_linked_to_finish (bool): Indicates whether the node is linked to the finish depot.
     """
 
     id_: int
     x: float
     y: float
     reward: float
-    is_linked_to_start: bool = False
-    is_linked_to_finish: bool = False
-    in_route = None
     depot_to_node = None
     node_to_depot = None
 
@@ -44,6 +35,8 @@ class Edge:
         inverse_edge (Edge): The inverse edge (arc).
         efficiency (float): The edge efficiency (enriched savings).
         type_ (int): The type of the edge. 0 = deterministic (default), 1 = stoch, 2 = dynamic.
+        params (tuple): The parameters of the uncertainty model for stochastic edges.
+        compiled_for (tuple): The simulation setup `type_` and `params` were compiled for.
     """
 
     origin: Node
@@ -53,6 +46,8 @@ class Edge:
     efficiency: float = 0.0
     inverse_edge = None
     type_ = None
+    params = None
+    compiled_for = None
 
 
 @dataclass
@@ -93,27 +88,12 @@ class Route:
         Args:
             filename (str, optional): If provided, saves the graph to the specified file. Otherwise, displays the graph.
         """
-        G = nx.DiGraph()
-        positions = {}
-        labels = {}
-
-        for edge in self.edges:
-            G.add_node(edge.origin.id_)
-            G.add_node(edge.end.id_)
-            positions[edge.origin.id_] = (edge.origin.x, edge.origin.y)
-            positions[edge.end.id_] = (edge.end.x, edge.end.y)
-            labels[edge.origin.id_] = str(edge.origin.id_)
-            labels[edge.end.id_] = str(edge.end.id_)
-
-        for edge in self.edges:
-            G.add_edge(edge.origin.id_, edge.end.id_, weight=edge.cost)
-
-        nx.draw(G, positions, with_labels=True, labels=labels, node_size=500, node_color='skyblue', font_size=10, font_weight='bold', arrowsize=20)
-        edge_labels = {(edge.origin.id_, edge.end.id_): f'{edge.cost:.1f}' for edge in self.edges}
-        nx.draw_networkx_edge_labels(G, positions, edge_labels=edge_labels)
-        plt.title('Route Visualization')
+        from .rendering import draw_solution
+
         if filename is not None:
-            plt.savefig(filename)
-        else: 
-            plt.show()
+            draw_solution(self, filename, title="Route Visualization")
+        else:
+            import matplotlib.pyplot as plt
 
+            draw_solution(self, title="Route Visualization", figure=plt.figure())
+            plt.show()
@@ -0,0 +1,157 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+def snapshot(solution):
+    """Copy what is needed to draw a solution into plain, picklable data.
+
+    Args:
+        solution: A `Solution` (or anything with a list of `routes`) or a single `Route`.
+
+    Returns:
+        dict: One entry per route with the visited node ids, their coordinates and
+        the edge costs, plus the solution reward and cost.
+    """
+    routes = []
+    for route in getattr(solution, "routes", [solution]):
+        if not route.edges:
+            continue
+        nodes = [route.edges[0].origin] + [edge.end for edge in route.edges]
+        routes.append(
+            {
+                "ids": [node.id_ for node in nodes],
+                "coordinates": np.array([(node.x, node.y) for node in nodes], dtype=float),
+                "costs": [edge.cost for edge in route.edges],
+            }
+        )
+    return {
+        "routes": routes,
+        "reward": getattr(solution, "reward", 0.0),
+        "cost": getattr(solution, "cost", 0.0),
+    }
+
+
+def draw_solution(solution, filename=None, title=None, costs=True, figure=None):
+    """Draw every route of a solution on one figure.
+
+    The figure is rendered by the Agg canvas, without pyplot or any interactive
+    backend, so it can be drawn from any thread or worker process.
+
+    Args:
+        solution: A `Solution`, a `Route` or a `snapshot` of them.
+        filename (str, optional): If provided, saves the figure to the specified file.
+        title (str, optional): Title of the figure; by default the solution reward and cost.
+        costs (bool): Label every edge with its cost.
+        figure (Figure, optional): Figure to draw on, e.g. a pyplot one to show it.
+
+    Returns:
+        Figure: The drawn figure.
+    """
+    data = solution if isinstance(solution, dict) else snapshot(solution)
+    if figure is None:
+        figure = Figure(figsize=(8, 6))
+        FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    for index, route in enumerate(data["routes"]):
+        points = route["coordinates"]
+        start, end = points[:-1], points[1:]
+        color = f"C{index % 10}"
+        ax.quiver(
+            start[:, 0],
+            start[:, 1],
+            end[:, 0] - start[:, 0],
+            end[:, 1] - start[:, 1],
+            angles="xy",
+            scale_units="xy",
+            scale=1,
+            width=0.004,
+            color=color,
+            label=f"route {index + 1}",
+        )
+        ax.scatter(points[:, 0], points[:, 1], s=200, color="skyblue", edgecolors=color, zorder=2)
+        for id_, (x, y) in zip(route["ids"], points.tolist()):
+            ax.annotate(str(id_), (x, y), ha="center", va="center", fontsize=8, weight="bold")
+        if costs:
+            middles = (start + end) / 2
+            for cost, (x, y) in zip(route["costs"], middles.tolist()):
+                ax.annotate(f"{cost:.1f}", (x, y), fontsize=7, color=color)
+    if data["routes"]:
+        ax.legend(loc="best", fontsize=8)
+    if title is None:
+        title = f"reward: {data['reward']:.1f}; cost: {data['cost']:.1f}"
+    ax.set_title(title)
+    ax.set_aspect("equal", adjustable="datalim")
+    if filename is not None:
+        figure.savefig(filename)
+    return figure
+
+
+def _render(data, filename, title, costs):
+    draw_solution(data, filename, title, costs)
+    return filename
+
+
+class Renderer:
+    """Background pool that draws solutions to image files.
+
+    `submit` only copies the routes into a `snapshot`; drawing and encoding the
+    image happen in worker processes, so rendering does not slow down the solver.
+
+    Attributes:
+        max_workers (int): Number of worker processes.
+        pending (list): Futures of the jobs not collected by `wait` yet.
+    """
+
+    def __init__(self, max_workers=1, mp_context=None):
+        self.max_workers = max_workers
+        self.pending = []
+        self._executor = ProcessPoolExecutor(max_workers, mp_context=mp_context)
+
+    def submit(self, solution, filename, title=None, costs=True):
+        """Queue the drawing of a solution.
+
+        Args:
+            solution: A `Solution`, a `Route` or a `snapshot` of them.
+            filename (str): The file the figure is saved to.
+            title (str, optional): Title of the figure.
+            costs (bool): Label every edge with its cost.
+
+        Returns:
+            Future: Resolves to `filename` once the file is written.
+        """
+        data = solution if isinstance(solution, dict) else snapshot(solution)
+        future = self._executor.submit(_render, data, filename, title, costs)
+        self.pending.append(future)
+        return future
+
+    def wait(self):
+        """Block until every queued job is done.
+
+        Returns:
+            list: The written filenames, in submission order.
+
+        Raises:
+            Exception: The first error raised by a job.
+        """
+        pending, self.pending = self.pending, []
+        return [future.result() for future in pending]
+
+    def close(self, wait=True):
+        """Shut the pool down; without `wait`, jobs that have not started are dropped."""
+        if not wait:
+            for future in self.pending:
+                future.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: max_workers={self.max_workers}, pending={len(self.pending)}"
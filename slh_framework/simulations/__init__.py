@@ -1,6 +1,8 @@
 from .base import Solution
 from .experimental import MonteCarlo
+from .sampling import samplers
+from .uncertainty import EdgeType, uncertainty_models
 
 pool = {"MonteCarlo": MonteCarlo.simulation}
 
-__all__ = [Solution, pool]
+__all__ = [Solution, pool, EdgeType, uncertainty_models, samplers]
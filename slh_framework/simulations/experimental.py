@@ -1,48 +1,166 @@
-import math
 import numpy as np
 
-from enum import auto, Enum
 from slh_framework.simulations.base import Simulation
+from slh_framework.simulations.uncertainty import EdgeType, LogNormal, ModuloEdgeTypePolicy
 
 
-class EdgeType(Enum):
-    DETERMINISTIC = auto()
-    STOCHASTIC = auto()
-    DYNAMIC = auto()
-
-    @classmethod
-    def default(cls):
-        return cls.DETERMINISTIC
+class ExperimentalSimulation(Simulation):
+    """Simulation of edges that can be deterministic, stochastic or dynamic.
 
+    Attributes:
+        condition_factors (dict): Environmental conditions applied to dynamic edges.
+        edge_type_policy (callable): Maps an `Edge` to its `EdgeType`.
+        uncertainty_model (UncertaintyModel): Distribution of stochastic edge costs.
+        sampler (Sampler): Variance-reduction sampler of the scenarios (see
+            `sampling.samplers`). None, the default, draws them from `numpy.random`
+            directly.
+    """
 
-class ExperimentalSimulation(Simulation):
     condition_factors = {}
+    edge_type_policy = ModuloEdgeTypePolicy()
+    uncertainty_model = LogNormal()
+    sampler = None
+
+    @classmethod
+    def get_edge_type(cls, edge):
+        return cls.edge_type_policy(edge)
 
     @classmethod
     def set_edges_type(cls, solution):
-        # check for divisibilty on node id
-        divisible_by = {2: EdgeType.STOCHASTIC, 3: EdgeType.DYNAMIC}
         for route in solution.routes:
             for edge in route.edges:
-                for quotient in divisible_by:
-                    if edge.end.id_ % quotient == 0:
-                        edge.type_ = divisible_by[quotient]
-                        break
-                else:
-                    edge.type_ = EdgeType.default()
+                edge.type_ = cls.get_edge_type(edge)
 
     @classmethod
-    def get_stochastic_value(cls, mean=None, var_level=None, scale=None, location=None):
-        if scale is None and location is None:
-            var = var_level * mean
-            mu = math.log(mean**2 / math.sqrt(var + mean**2))
-            sigma = math.sqrt(math.log(1 + var / mean**2))
-            stochastic_cost = np.random.lognormal(mean=mu, sigma=sigma)
-        elif mean is None and var_level is None:
-            stochastic_cost = np.random.lognormal(mean=scale, sigma=location)
-        else:
-            raise ValueError("Error using lognormal distribution")
-        return stochastic_cost
+    def compile_edges(cls, solution, var_level):
+        """Set the type and uncertainty parameters of the edges of `solution`.
+
+        Edges are shared by every solution built for an instance, so each edge is
+        compiled once and only recompiled if the policy, the model (see `Revisioned`)
+        or `var_level` change. Parameters of all the newly seen stochastic edges are
+        computed in a single call to the model.
+        """
+        key = (_revision(cls.edge_type_policy), _revision(cls.uncertainty_model), var_level)
+        pending = [
+            edge
+            for route in solution.routes
+            for edge in route.edges
+            if edge.compiled_for != key
+        ]
+        if not pending:
+            return
+        stochastic = []
+        for edge in pending:
+            edge.type_ = cls.get_edge_type(edge)
+            edge.params = None
+            edge.compiled_for = key
+            if edge.type_ == EdgeType.STOCHASTIC:
+                stochastic.append(edge)
+        if stochastic:
+            params = cls.uncertainty_model.parameters(
+                [edge.cost for edge in stochastic], var_level
+            )
+            for edge, row in zip(stochastic, params.tolist()):
+                edge.params = tuple(row)
+
+    @classmethod
+    def stack_solutions(cls, solutions):
+        """Stack the routes of several solutions into padded arrays.
+
+        Returns:
+            tuple: The distinct edges of all the solutions (list), an int array of
+            shape (solutions, routes, edges) indexing into that list, padded with
+            `len(edges)`, and the reward of every route, shape (solutions, routes).
+        """
+        n_routes = max([len(solution.routes) for solution in solutions] + [1])
+        n_edges = max(
+            [len(route.edges) for solution in solutions for route in solution.routes] + [1]
+        )
+        edges, index = [], {}
+        edge_index = np.zeros((len(solutions), n_routes, n_edges), dtype=np.intp)
+        route_rewards = np.zeros((len(solutions), n_routes))
+        positions = []
+        for s, solution in enumerate(solutions):
+            for r, route in enumerate(solution.routes):
+                for e, edge in enumerate(route.edges):
+                    # the same arc in different solutions gets the same sampled cost
+                    key = (edge.origin.id_, edge.end.id_)
+                    if key not in index:
+                        index[key] = len(edges)
+                        edges.append(edge)
+                    positions.append((s, r, e, index[key]))
+                    route_rewards[s, r] += edge.end.reward
+        edge_index[...] = len(edges)
+        if positions:
+            s, r, e, i = np.array(positions).T
+            edge_index[s, r, e] = i
+        return edges, edge_index, route_rewards
+
+    @classmethod
+    def random_dimensions(cls, edges):
+        """Number of random inputs of a scenario of the cost of compiled `edges`."""
+        types = [edge.type_ for edge in edges]
+        n_stochastic = types.count(EdgeType.STOCHASTIC)
+        n_dynamic = types.count(EdgeType.DYNAMIC)
+        n_conditions = len(cls.condition_factors)
+        if not n_dynamic or not n_conditions:
+            return n_stochastic
+        return n_stochastic + 1 + n_dynamic * (n_conditions - 1)
+
+    @classmethod
+    def sample_edge_costs(cls, edges, size, random_state=np.random, uniforms=None):
+        """Draw `size` scenarios of the cost of compiled `edges`.
+
+        Every dynamic edge gets its own draw of the condition values, except for the
+        first condition, which is shared by all the edges of a scenario.
+
+        Args:
+            uniforms (np.ndarray, optional): Points of shape
+                (size, `random_dimensions(edges)`) generated by a sampler. Their
+                columns are the stochastic edge costs, mapped through the inverse
+                CDF of the uncertainty model (or drawn from `random_state` if it has
+                none), then the first condition and the other conditions of every
+                dynamic edge. By default the scenarios are drawn from `random_state`.
+
+        Returns:
+            np.ndarray: Costs of shape (size, len(edges) + 1); the last column is a
+            zero-cost padding edge.
+        """
+        costs = np.zeros((size, len(edges) + 1))
+        nominal = np.array([edge.cost for edge in edges], dtype=float)
+        types = [edge.type_ for edge in edges]
+        deterministic = [i for i, type_ in enumerate(types) if type_ == EdgeType.DETERMINISTIC]
+        stochastic = [i for i, type_ in enumerate(types) if type_ == EdgeType.STOCHASTIC]
+        dynamic = [i for i, type_ in enumerate(types) if type_ == EdgeType.DYNAMIC]
+
+        costs[:, deterministic] = nominal[deterministic]
+        if stochastic:
+            params = np.array([edges[i].params for i in stochastic], dtype=float)
+            sampled = None
+            if uniforms is not None:
+                try:
+                    sampled = cls.uncertainty_model.ppf(params, uniforms[:, : len(stochastic)])
+                except NotImplementedError:
+                    pass  # a model without inverse CDF is sampled directly
+            if sampled is None:
+                sampled = cls.uncertainty_model.sample(params, size, random_state)
+            costs[:, stochastic] = sampled
+        if dynamic:
+            factors = np.array(
+                [condition["factor"] for condition in cls.condition_factors.values()]
+            )
+            multiplier = np.ones((size, len(dynamic)))
+            if len(factors):
+                if uniforms is None:
+                    first = random_state.random((size, 1))
+                    others = random_state.random((size, len(dynamic), len(factors) - 1))
+                else:
+                    conditions = uniforms[:, len(stochastic) :]
+                    first = conditions[:, :1]
+                    others = conditions[:, 1:].reshape(size, len(dynamic), len(factors) - 1)
+                multiplier += factors[0] * first + others @ factors[1:]
+            costs[:, dynamic] = nominal[dynamic] * multiplier
+        return costs
 
     @classmethod
     def get_dynamic_value(cls, edge, condition_factors):
@@ -72,10 +190,20 @@ class ExperimentalSimulation(Simulation):
         return dynamic_cost
 
 
+def _revision(obj):
+    # a plain callable policy has no revision; it is compared by identity
+    return getattr(obj, "revision", obj)
+
+
 class MonteCarlo(ExperimentalSimulation):
     @classmethod
     def simulation(cls, solution, max_iterations, route_max_cost, var_level):
-        cls.set_edges_type(solution)
+        if cls.sampler is not None:
+            # the sampler needs all the scenarios of the run at once
+            cls.batch_simulation([solution], max_iterations, route_max_cost, var_level)
+            return
+        cls.compile_edges(solution, var_level)
+        model = cls.uncertainty_model
         accumlated_reward = 0
         first_condition = next(iter(cls.condition_factors))
         for _ in range(max_iterations):
@@ -89,9 +217,7 @@ class MonteCarlo(ExperimentalSimulation):
                     if edge.type_ == EdgeType.DETERMINISTIC:
                         edge_cost = edge.cost
                     elif edge.type_ == EdgeType.STOCHASTIC:
-                        edge_cost = cls.get_stochastic_value(
-                            mean=edge.cost, var_level=var_level
-                        )
+                        edge_cost = model.draw(edge.params)
                     elif edge.type_ == EdgeType.DYNAMIC:
                         for condition in cls.condition_factors:
                             if condition == first_condition:
@@ -110,3 +236,45 @@ class MonteCarlo(ExperimentalSimulation):
 
             accumlated_reward += reward_in_solution
         solution.reward_after = accumlated_reward / max_iterations
+
+    @classmethod
+    def batch_simulation(
+        cls,
+        solutions,
+        max_iterations,
+        route_max_cost,
+        var_level,
+        chunk_size=256,
+        random_state=np.random,
+    ):
+        """Simulate several solutions at once against the same sampled scenarios.
+
+        The routes of all the solutions are stacked into padded edge arrays and
+        evaluated in a vectorized pass per chunk of `chunk_size` scenarios. Sharing
+        the scenarios (common random numbers) makes the comparison between the
+        solutions much less noisy than simulating them one by one. With a `sampler`,
+        the points of all the scenarios are generated upfront and the chunks take
+        consecutive rows. Sets `reward_after` on every solution.
+        """
+        for solution in solutions:
+            cls.compile_edges(solution, var_level)
+        edges, edge_index, route_rewards = cls.stack_solutions(solutions)
+        uniforms = None
+        if cls.sampler is not None:
+            uniforms = cls.sampler.uniforms(
+                max_iterations, cls.random_dimensions(edges), random_state
+            )
+        accumulated_reward = np.zeros(len(solutions))
+        for start in range(0, max_iterations, chunk_size):
+            size = min(chunk_size, max_iterations - start)
+            costs = cls.sample_edge_costs(
+                edges,
+                size,
+                random_state,
+                None if uniforms is None else uniforms[start : start + size],
+            )
+            route_costs = costs[:, edge_index].sum(axis=-1)
+            rewards = np.where(route_costs > route_max_cost, 0.0, route_rewards)
+            accumulated_reward += rewards.sum(axis=(0, 2))
+        for solution, reward in zip(solutions, (accumulated_reward / max_iterations).tolist()):
+            solution.reward_after = reward
@@ -0,0 +1,206 @@
+import functools
+import numpy as np
+
+from slh_framework.simulations._joe_kuo import TABLE
+
+
+class Sampler:
+    """Generator of the uniforms behind the random inputs of a simulation.
+
+    A scenario of a simulation is a point of the unit hypercube, one coordinate per
+    random input (a stochastic edge cost or a condition value); the simulation maps
+    it to costs through the inverse CDF of the uncertainty model. Samplers other
+    than `PseudoRandom` spread the points of a run more evenly than independent
+    draws, so the estimates converge faster. Every point is still uniformly
+    distributed, so the estimates stay unbiased.
+    """
+
+    def uniforms(self, size, dimensions, random_state=np.random):
+        """Return `size` points of the unit hypercube, an array of shape (size, dimensions).
+
+        Args:
+            size (int): Number of points, i.e. scenarios of the run.
+            dimensions (int): Number of random inputs of a scenario.
+            random_state: `numpy.random`, a `RandomState` or a `Generator`, used for
+                the randomization.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+
+class PseudoRandom(Sampler):
+    """Independent uniform draws, the plain Monte Carlo baseline."""
+
+    def uniforms(self, size, dimensions, random_state=np.random):
+        return _open(random_state.random((size, dimensions)))
+
+
+class Antithetic(Sampler):
+    """Antithetic pairs: every point `u` is followed by its mirror `1 - u`.
+
+    Costs are monotone in the uniforms, so the two scenarios of a pair are
+    negatively correlated and their errors partly cancel.
+    """
+
+    def uniforms(self, size, dimensions, random_state=np.random):
+        half = _open(random_state.random(((size + 1) // 2, dimensions)))
+        return np.stack((half, 1 - half), axis=1).reshape(len(half) * 2, dimensions)[:size]
+
+
+class LatinHypercube(Sampler):
+    """Latin hypercube sampling: every input hits each of `size` strata exactly once."""
+
+    def uniforms(self, size, dimensions, random_state=np.random):
+        # ranks of independent draws are independent random permutations, per column
+        strata = np.argsort(random_state.random((size, dimensions)), axis=0)
+        return _open((strata + random_state.random((size, dimensions))) / size)
+
+
+class Halton(Sampler):
+    """Halton sequence with random digit permutations.
+
+    Coordinate j is the radical inverse of the point index in the j-th prime base.
+    With `scramble`, the digits of each level are passed through a random
+    permutation, which breaks the correlations between the coordinates of large
+    bases, and a uniform draw fills in the digits below the last level.
+    """
+
+    def __init__(self, scramble=True):
+        self.scramble = scramble
+
+    def uniforms(self, size, dimensions, random_state=np.random):
+        indices = np.arange(size)
+        points = np.empty((size, dimensions))
+        for j, base in enumerate(_primes(dimensions)):
+            levels, capacity = 1, base
+            while capacity < size:
+                levels, capacity = levels + 1, capacity * base
+            point, remainder, scale = np.zeros(size), indices, 1.0
+            for _ in range(levels):
+                remainder, digits = np.divmod(remainder, base)
+                scale /= base
+                if self.scramble:
+                    digits = random_state.permutation(base)[digits]
+                point += digits * scale
+            if self.scramble:
+                point += random_state.random(size) * scale
+            else:
+                point += 0.5 * scale
+            points[:, j] = point
+        return _open(points)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: scramble={self.scramble}"
+
+
+class Sobol(Sampler):
+    """Sobol sequence with the Joe-Kuo direction numbers, randomly scrambled.
+
+    The direction numbers are those of the new-joe-kuo-6.21201 table, for up to
+    1024 dimensions. With `scramble`, they go through a random linear matrix
+    scramble, and the points are XORed with a random digital shift and jittered
+    within their last bit: every point is uniformly distributed and the net
+    structure of the sequence is kept. The balance properties of the sequence hold
+    for runs of a power of 2 points.
+
+    Inputs beyond the 1024 dimensions of the table, e.g. of a large batch of
+    candidates, are padded with Latin hypercube columns: they are still stratified
+    and uniformly distributed, so a run never fails on its number of inputs.
+    """
+
+    bits = 32
+
+    def __init__(self, scramble=True):
+        self.scramble = scramble
+
+    def uniforms(self, size, dimensions, random_state=np.random):
+        if size >= 2**self.bits:
+            raise ValueError(f"A Sobol run has at most 2**{self.bits} - 1 points")
+        padding = max(dimensions - len(_direction_table()), 0)
+        dimensions -= padding
+        directions = self.directions(dimensions)
+        if self.scramble:
+            directions = self._linear_scramble(directions, random_state)
+        indices = np.arange(size, dtype=np.uint64)
+        gray = indices ^ (indices >> np.uint64(1))
+        points = np.zeros((size, dimensions), dtype=np.uint64)
+        for k in range(max(1, int(size).bit_length())):
+            bit = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+            points[bit] ^= directions[:, k]
+        if self.scramble:
+            shift = np.floor(random_state.random(dimensions) * 2**self.bits).astype(np.uint64)
+            points ^= shift
+            jitter = random_state.random((size, dimensions))
+        else:
+            jitter = 0.5
+        points = (points.astype(float) + jitter) / 2**self.bits
+        if padding:
+            points = np.hstack((points, LatinHypercube().uniforms(size, padding, random_state)))
+        return _open(points)
+
+    def directions(self, dimensions):
+        """Direction numbers of shape (dimensions, bits), as `bits`-bit integers."""
+        table = _direction_table()
+        if dimensions > len(table):
+            raise ValueError(
+                f"Sobol points have at most {len(table)} dimensions, not {dimensions}; "
+                "use the halton or latin_hypercube sampler"
+            )
+        directions = np.zeros((dimensions, self.bits), dtype=np.uint64)
+        for j, (polynomial, *m) in enumerate(table[:dimensions]):
+            degree = polynomial.bit_length() - 1
+            if degree == 0:
+                # the first coordinate is the van der Corput sequence
+                m = [1] * self.bits
+            for k in range(degree, self.bits):
+                value = m[k - degree] ^ (m[k - degree] << degree)
+                for i in range(1, degree):
+                    if polynomial >> (degree - i) & 1:
+                        value ^= m[k - i] << i
+                m.append(value)
+            directions[j] = [m[k] << (self.bits - k - 1) for k in range(self.bits)]
+        return directions
+
+    def _linear_scramble(self, directions, random_state):
+        # multiply the bits of every direction number, most significant first, by a
+        # random lower triangular matrix with a unit diagonal, one per dimension
+        dimensions = len(directions)
+        shifts = np.arange(self.bits - 1, -1, -1, dtype=np.uint64)
+        bits = ((directions[:, :, None] >> shifts) & np.uint64(1)).astype(np.int64)
+        matrices = np.tril(random_state.random((dimensions, self.bits, self.bits)) < 0.5)
+        matrices[:, np.arange(self.bits), np.arange(self.bits)] = True
+        scrambled = np.einsum("dkc,drc->dkr", bits, matrices.astype(np.int64)) % 2
+        return (scrambled.astype(np.uint64) << shifts).sum(axis=-1, dtype=np.uint64)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>: scramble={self.scramble}"
+
+
+def _open(points):
+    # inverse CDFs are infinite at 0 and 1
+    return np.clip(points, 2**-53, 1 - 2**-53)
+
+
+def _primes(count):
+    primes, candidate = [], 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+@functools.lru_cache(maxsize=None)
+def _direction_table():
+    return [tuple(int(value) for value in line.split()) for line in TABLE.splitlines()]
+
+
+samplers = {
+    "random": PseudoRandom,
+    "antithetic": Antithetic,
+    "latin_hypercube": LatinHypercube,
+    "halton": Halton,
+    "sobol": Sobol,
+}
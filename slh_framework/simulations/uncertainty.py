@@ -0,0 +1,414 @@
+import math
+import uuid
+import numpy as np
+
+from enum import auto, Enum
+
+
+# coefficients of Wichura's AS241 (PPND16) approximation of the normal quantile
+_AS241_CENTRAL = (
+    (
+        2.5090809287301226727e3, 3.3430575583588128105e4, 6.7265770927008700853e4,
+        4.5921953931549871457e4, 1.3731693765509461125e4, 1.9715909503065514427e3,
+        1.3314166789178437745e2, 3.3871328727963666080e0,
+    ),
+    (
+        5.2264952788528545610e3, 2.8729085735721942674e4, 3.9307895800092710610e4,
+        2.1213794301586595867e4, 5.3941960214247511077e3, 6.8718700749205790830e2,
+        4.2313330701600911252e1, 1.0,
+    ),
+)
+_AS241_INTERMEDIATE = (
+    (
+        7.74545014278341407640e-4, 2.27238449892691845833e-2, 2.41780725177450611770e-1,
+        1.27045825245236838258e0, 3.64784832476320460504e0, 5.76949722146069140550e0,
+        4.63033784615654529590e0, 1.42343711074968357734e0,
+    ),
+    (
+        1.05075007164441684324e-9, 5.47593808499534494600e-4, 1.51986665636164571966e-2,
+        1.48103976427480074590e-1, 6.89767334985100004550e-1, 1.67638483018380384940e0,
+        2.05319162663775882187e0, 1.0,
+    ),
+)
+_AS241_TAIL = (
+    (
+        2.01033439929228813265e-7, 2.71155556874348757815e-5, 1.24266094738807843860e-3,
+        2.65321895265761230930e-2, 2.96560571828504891230e-1, 1.78482653991729133580e0,
+        5.46378491116411436990e0, 6.65790464350110377720e0,
+    ),
+    (
+        2.04426310338993978564e-15, 1.42151175831644588870e-7, 1.84631831751005468180e-5,
+        7.86869131145613259100e-4, 1.48753612908506148525e-2, 1.36929880922735805310e-1,
+        5.99832206555887937690e-1, 1.0,
+    ),
+)
+
+
+def ndtri(p):
+    """Quantile function of the standard normal distribution, for p in (0, 1)."""
+    p = np.asarray(p, dtype=float)
+    q = p - 0.5
+    central = np.abs(q) <= 0.425
+    r = np.where(central, 0.180625 - q * q, 0.0)
+    numerator, denominator = _AS241_CENTRAL
+    value = q * np.polyval(numerator, r) / np.polyval(denominator, r)
+
+    tail = ~central
+    if tail.any():
+        r = np.sqrt(-np.log(np.minimum(p[tail], 1 - p[tail])))
+        intermediate = r <= 5
+        numerator, denominator = _AS241_INTERMEDIATE
+        near = np.polyval(numerator, r - 1.6) / np.polyval(denominator, r - 1.6)
+        numerator, denominator = _AS241_TAIL
+        far = np.polyval(numerator, r - 5) / np.polyval(denominator, r - 5)
+        value[tail] = np.copysign(np.where(intermediate, near, far), q[tail])
+    return value
+
+
+def gammainc(a, x):
+    """Regularized lower incomplete gamma function P(a, x), for a > 0 and x >= 0."""
+    a, x = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(x, dtype=float))
+    return _gammainc(a, x, _log_gamma(a))[0]
+
+
+def gammaincinv(a, p):
+    """Inverse of `gammainc` in x, for a >= 0 (0 for a = 0) and p in (0, 1).
+
+    Halley iterations from the Wilson-Hilferty approximation (a > 1) or from the
+    small-x expansion (a <= 1), as in Numerical Recipes. Above the median, they
+    solve for the upper function, which keeps the upper tail accurate.
+    """
+    a, p = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(p, dtype=float))
+    shape = a.shape
+    degenerate = (a <= 0).ravel()
+    a, p = np.where(a <= 0, 1.0, a).ravel(), p.ravel()
+    log_gamma_a = _log_gamma(a)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wilson_hilferty = a * (1 - 1 / (9 * a) + ndtri(p) / (3 * np.sqrt(a))) ** 3
+        t = 1 - a * (0.253 + a * 0.12)
+        small = np.where(p < t, (p / t) ** (1 / a), 1 - np.log1p(-(p - t) / (1 - t)))
+    x = np.where(a > 1, np.maximum(wilson_hilferty, 1e-3), small)
+    # only the points that have not converged yet are iterated on
+    active = np.arange(len(x))
+    for _ in range(20):
+        a_, p_, x_ = a[active], p[active], np.maximum(x[active], np.finfo(float).tiny)
+        lower, upper = _gammainc(a_, x_, log_gamma_a[active])
+        error = np.where(p_ < 0.5, lower - p_, (1 - p_) - upper)
+        density = np.exp(-x_ + (a_ - 1) * np.log(x_) - log_gamma_a[active])
+        u = error / density
+        step = u / (1 - 0.5 * np.minimum(1, u * ((a_ - 1) / x_ - 1)))
+        new_x = x_ - step
+        x[active] = np.where(new_x <= 0, 0.5 * x_, new_x)
+        active = active[np.abs(step) >= 1e-13 * x[active]]
+        if not len(active):
+            break
+    return np.where(degenerate, 0.0, x).reshape(shape)
+
+
+def _log_gamma(a):
+    return np.vectorize(math.lgamma, otypes=[float])(a)
+
+
+def _gammainc(a, x, log_gamma_a):
+    # P(a, x) and Q(a, x) = 1 - P(a, x), from the series expansion below x = a + 1
+    # and from the continued fraction of Q above, as in Numerical Recipes
+    eps = np.finfo(float).eps
+    tiny = np.finfo(float).tiny / eps
+    with np.errstate(divide="ignore"):
+        prefactor = np.exp(-x + a * np.log(x) - log_gamma_a)
+    lower, upper = np.empty(a.shape), np.empty(a.shape)
+
+    # both expansions are summed for the points that have not converged yet only
+    series = np.flatnonzero(x < a + 1)
+    a_s, x_s = a.flat[series], x.flat[series]
+    term = total = 1 / a_s
+    denominator = a_s.copy()
+    sums = np.empty(len(series))
+    active = np.arange(len(series))
+    for _ in range(1000):
+        denominator = denominator + 1
+        term = term * x_s / denominator
+        total = total + term
+        converged = np.abs(term) < np.abs(total) * eps
+        sums[active[converged]] = total[converged]
+        active, term, total = active[~converged], term[~converged], total[~converged]
+        denominator, x_s = denominator[~converged], x_s[~converged]
+        if not len(active):
+            break
+    sums[active] = total
+    lower.flat[series] = sums * prefactor.flat[series]
+    upper.flat[series] = 1 - lower.flat[series]
+
+    fraction = np.flatnonzero(x >= a + 1)
+    a_f, x_f = a.flat[fraction], x.flat[fraction]
+    b = x_f + 1 - a_f
+    c = np.full(b.shape, 1 / tiny)
+    d = 1 / b
+    h = d
+    fractions = np.empty(len(fraction))
+    active = np.arange(len(fraction))
+    for i in range(1, 1000):
+        an = -i * (i - a_f)
+        b = b + 2
+        d = an * d + b
+        d = np.where(np.abs(d) < tiny, tiny, d)
+        c = b + an / c
+        c = np.where(np.abs(c) < tiny, tiny, c)
+        d = 1 / d
+        delta = d * c
+        h = h * delta
+        converged = np.abs(delta - 1) < eps
+        fractions[active[converged]] = h[converged]
+        keep = ~converged
+        active, a_f, b, c, d, h = active[keep], a_f[keep], b[keep], c[keep], d[keep], h[keep]
+        if not len(active):
+            break
+    fractions[active] = h
+    upper.flat[fraction] = prefactor.flat[fraction] * fractions
+    lower.flat[fraction] = 1 - upper.flat[fraction]
+    return lower, upper
+
+
+class EdgeType(Enum):
+    DETERMINISTIC = auto()
+    STOCHASTIC = auto()
+    DYNAMIC = auto()
+
+    @classmethod
+    def default(cls):
+        return cls.DETERMINISTIC
+
+
+class Revisioned:
+    """Object whose changes are tracked by a `revision` number.
+
+    Simulations compile edges for the revisions of their edge type policy and
+    uncertainty model, so the edges are recompiled when either is replaced or
+    changed. Assigning an attribute gives the object a new revision; call `touch`
+    after changing an attribute in place (e.g. adding to a dict of types).
+    Revisions are random, so they are never reused by another object, and copies
+    keep the revision of their original.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        self.touch()
+        return self
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        self.touch()
+
+    def touch(self):
+        object.__setattr__(self, "revision", uuid.uuid4().int)
+
+
+class ModuloEdgeTypePolicy(Revisioned):
+    """Edge type from the divisibility of the id of the edge's end node.
+
+    Attributes:
+        divisible_by (dict): Maps a divisor to the `EdgeType` of the edges whose end
+            node id it divides. Divisors are checked in insertion order.
+    """
+
+    def __init__(self, divisible_by=None):
+        if divisible_by is None:
+            divisible_by = {2: EdgeType.STOCHASTIC, 3: EdgeType.DYNAMIC}
+        self.divisible_by = divisible_by
+
+    def __call__(self, edge):
+        for quotient, type_ in self.divisible_by.items():
+            if edge.end.id_ % quotient == 0:
+                return type_
+        return EdgeType.default()
+
+
+class NodeEdgeTypePolicy(Revisioned):
+    """Edge type looked up by the id of the edge's end node.
+
+    Attributes:
+        types (dict): Maps a node id to the `EdgeType` of the edges arriving at it.
+        default (EdgeType): Type of the edges arriving at any other node.
+    """
+
+    def __init__(self, types, default=EdgeType.DETERMINISTIC):
+        self.types = types
+        self.default = default
+
+    def __call__(self, edge):
+        return self.types.get(edge.end.id_, self.default)
+
+
+class UncertaintyModel(Revisioned):
+    """Distribution of the stochastic cost of an edge.
+
+    A model is compiled once per edge: `parameters` turns nominal edge costs into a
+    fixed-width array of distribution parameters, one row per edge. Costs are then
+    drawn either one at a time with `draw`, which consumes the global `numpy.random`
+    stream exactly like the scalar simulation loop expects, or in bulk with `sample`.
+    """
+
+    def parameters(self, costs, var_level):
+        """Return an array of shape (len(costs), k) with the distribution parameters."""
+        raise NotImplementedError
+
+    def sample(self, params, size=None, random_state=np.random):
+        """Draw costs for every row of `params`.
+
+        Args:
+            params (np.ndarray): Parameters of m edges, as returned by `parameters`.
+            size (int, optional): Number of scenarios; the result has shape (size, m).
+                If None, a single scenario of shape (m,) is drawn.
+            random_state: `numpy.random`, a `RandomState` or a `Generator`.
+        """
+        raise NotImplementedError
+
+    def draw(self, params):
+        return float(self.sample(np.asarray(params, dtype=float)[None])[0])
+
+    def ppf(self, params, uniforms):
+        """Map uniforms of shape (size, m) to costs through the inverse CDF.
+
+        Used by the variance-reduction samplers, which generate the uniforms. Models
+        without it are sampled directly, without variance reduction.
+        """
+        raise NotImplementedError(f"{self!r} has no inverse CDF")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+
+class LogNormal(UncertaintyModel):
+    """Lognormal cost with mean `cost` and variance `var_level * cost` (the default)."""
+
+    def parameters(self, costs, var_level):
+        params = []
+        # plain floats and `math` keep draws bit-identical to the scalar simulation
+        for mean in np.asarray(costs, dtype=float).tolist():
+            if mean <= 0:
+                params.append((-math.inf, 0.0))
+                continue
+            var = var_level * mean
+            mu = math.log(mean**2 / math.sqrt(var + mean**2))
+            sigma = math.sqrt(math.log(1 + var / mean**2))
+            params.append((mu, sigma))
+        return np.array(params, dtype=float).reshape(-1, 2)
+
+    def sample(self, params, size=None, random_state=np.random):
+        shape = None if size is None else (size, len(params))
+        return random_state.lognormal(mean=params[:, 0], sigma=params[:, 1], size=shape)
+
+    def draw(self, params):
+        mu, sigma = params
+        return np.random.lognormal(mean=mu, sigma=sigma)
+
+    def ppf(self, params, uniforms):
+        return np.exp(params[:, 0] + params[:, 1] * ndtri(uniforms))
+
+
+class Gamma(UncertaintyModel):
+    """Gamma cost with mean `cost` and variance `var_level * cost`."""
+
+    def parameters(self, costs, var_level):
+        costs = np.asarray(costs, dtype=float)
+        shape = np.where(costs > 0, costs / var_level, 0.0)
+        scale = np.full_like(costs, var_level)
+        return np.column_stack((shape, scale))
+
+    def sample(self, params, size=None, random_state=np.random):
+        shape = None if size is None else (size, len(params))
+        return random_state.gamma(params[:, 0], params[:, 1], size=shape)
+
+    def draw(self, params):
+        shape, scale = params
+        return np.random.gamma(shape, scale)
+
+    def ppf(self, params, uniforms):
+        return params[:, 1] * gammaincinv(params[:, 0], uniforms)
+
+
+class TruncatedNormal(UncertaintyModel):
+    """Normal cost with mean `cost` and variance `var_level * cost`, truncated below.
+
+    Attributes:
+        lower (float): Truncation point; no cost is drawn below it.
+    """
+
+    def __init__(self, lower=0.0):
+        self.lower = lower
+
+    def parameters(self, costs, var_level):
+        costs = np.asarray(costs, dtype=float)
+        return np.column_stack((costs, np.sqrt(var_level * np.maximum(costs, 0.0))))
+
+    def sample(self, params, size=None, random_state=np.random):
+        # through the inverse CDF, so however far below `lower` the mean is, no
+        # draw is rejected
+        shape = (len(params),) if size is None else (size, len(params))
+        return self.ppf(params, random_state.random(shape))
+
+    def ppf(self, params, uniforms):
+        mean, std = params[:, 0], params[:, 1]
+        # probability mass above the truncation point, per edge
+        above = np.array(
+            [
+                0.0 if sd == 0 else 0.5 * math.erfc((self.lower - m) / (sd * math.sqrt(2)))
+                for m, sd in params.tolist()
+            ]
+        )
+        # without spread, or mass above `lower`, every cost is `max(mean, lower)`
+        degenerate = above == 0
+        # the upper tail keeps its precision when `above` is tiny
+        tail = np.maximum(np.where(degenerate, 0.5, above * (1 - uniforms)), np.finfo(float).tiny)
+        costs = mean - std * ndtri(tail)
+        return np.where(degenerate, np.maximum(mean, self.lower), np.maximum(costs, self.lower))
+
+
+class Empirical(UncertaintyModel):
+    """Histogram of recorded travel times, relative to the planned edge cost.
+
+    A cost is drawn as `cost * ratio`, where `ratio` is sampled from a histogram of
+    the recorded `actual / planned` travel time ratios: a bin is picked by its
+    frequency and the ratio is drawn uniformly inside it. `var_level` is ignored, the
+    spread comes from the records.
+
+    Attributes:
+        bin_edges (np.ndarray): Edges of the histogram bins.
+        cdf (np.ndarray): Cumulative frequency of each bin.
+    """
+
+    def __init__(self, ratios, bins="auto"):
+        frequencies, self.bin_edges = np.histogram(np.asarray(ratios, dtype=float), bins=bins)
+        self.cdf = np.cumsum(frequencies) / frequencies.sum()
+
+    @classmethod
+    def from_travel_times(cls, planned, actual, bins="auto"):
+        """Build the model from paired planned and recorded travel times."""
+        return cls(np.asarray(actual, dtype=float) / np.asarray(planned, dtype=float), bins)
+
+    def parameters(self, costs, var_level):
+        return np.asarray(costs, dtype=float).reshape(-1, 1)
+
+    def sample(self, params, size=None, random_state=np.random):
+        shape = (len(params),) if size is None else (size, len(params))
+        bins = np.searchsorted(self.cdf, random_state.random(shape), side="right")
+        bins = np.minimum(bins, len(self.cdf) - 1)
+        low, high = self.bin_edges[bins], self.bin_edges[bins + 1]
+        ratios = low + (high - low) * random_state.random(shape)
+        return params[:, 0] * ratios
+
+    def ppf(self, params, uniforms):
+        bins = np.minimum(np.searchsorted(self.cdf, uniforms, side="right"), len(self.cdf) - 1)
+        lower = np.where(bins > 0, self.cdf[bins - 1], 0.0)
+        within = (uniforms - lower) / (self.cdf[bins] - lower)
+        low, high = self.bin_edges[bins], self.bin_edges[bins + 1]
+        return params[:, 0] * (low + (high - low) * within)
+
+
+uncertainty_models = {
+    "lognormal": LogNormal,
+    "gamma": Gamma,
+    "truncated_normal": TruncatedNormal,
+    "empirical": Empirical,
+}
@@ -0,0 +1,28 @@
+import itertools
+
+from unittest import mock
+
+
+def fake_clock(module="slh_framework.algorithms._algorithms"):
+    """Patch the `time` of `module` with a clock ticking one second per call.
+
+    The number of iterations (or rounds) of a run is then exact. The patcher is
+    used as a context manager, or started and stopped.
+    """
+    clock = itertools.count()
+    return mock.patch(f"{module}.time", lambda: next(clock))
+
+
+def describe_edges(edges):
+    return [(e.origin.id_, e.end.id_, e.cost, e.savings, e.efficiency) for e in edges]
+
+
+def describe_solution(solution):
+    return (
+        solution.cost,
+        solution.reward,
+        [
+            (route.cost, route.reward, [(e.origin.id_, e.end.id_) for e in route.edges])
+            for route in solution.routes
+        ],
+    )
@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import unittest
+
+from copy import deepcopy
+from random import seed as random_seed
+from unittest import mock
+
+from numpy import random as np_random
+
+from slh_framework.algorithms import (
+    ConstructionCache,
+    SharedInstance,
+    pj_heuristic,
+    simulated_annealing_heuristic,
+)
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import TestInstance, tests
+from slh_framework.simulations import MonteCarlo as Simulation
+
+from helpers import describe_edges, fake_clock
+
+
+class TestConstructionCache(unittest.TestCase):
+    seed = 1025747
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.test = TestInstance("p1.2.r", max_time=20, seed=self.seed)
+        self.data = tests["p1.2.r"].instance_data
+
+    def test_hit_matches_alpha_sweep(self):
+        nodes = HeuristicUtils.to_node_list(self.data["node_list"])
+        alpha, efficiency_list, initial_solution = HeuristicUtils.generate_initial_construction(
+            self.data, self.data["fleet_size"], self.data["route_max_cost"], nodes
+        )
+        cache = ConstructionCache(self.directory)
+        cache.construction(self.data)
+        # a new cache object, as in another process of the sweep
+        other = ConstructionCache(self.directory)
+        with mock.patch.object(
+            HeuristicUtils, "generate_initial_construction", side_effect=AssertionError
+        ):
+            cached_alpha, cached_nodes, cached_list, cached_solution = other.construction(self.data)
+        self.assertEqual((cache.misses, other.hits), (1, 1))
+        self.assertEqual(cached_alpha, alpha)
+        self.assertEqual(describe_edges(cached_list), describe_edges(efficiency_list))
+        self.assertEqual(
+            [describe_edges(route.edges) for route in cached_solution.routes],
+            [describe_edges(route.edges) for route in initial_solution.routes],
+        )
+        self.assertEqual(
+            (cached_solution.cost, cached_solution.reward),
+            (initial_solution.cost, initial_solution.reward),
+        )
+        first_edge = cached_solution.routes[0].edges[0]
+        self.assertIs(first_edge, cached_nodes[first_edge.end.id_].depot_to_node)
+
+    def test_conflicting_construction_sources(self):
+        cache = ConstructionCache(self.directory)
+        with SharedInstance.publish(self.data) as shared:
+            for heuristic in (pj_heuristic, simulated_annealing_heuristic):
+                with self.subTest(heuristic=heuristic.__name__):
+                    with self.assertRaisesRegex(ValueError, "shared, cache"):
+                        heuristic(
+                            self.test, self.data, Simulation.simulation, shared=shared, cache=cache
+                        )
+        self.assertEqual((cache.misses, cache.hits), (0, 0))
+
+    def test_key_depends_on_content_and_alphas(self):
+        cache = ConstructionCache(self.directory)
+        data = deepcopy(self.data)
+        data["route_max_cost"] += 1
+        self.assertNotEqual(cache.key(data), cache.key(self.data))
+        coarse = ConstructionCache(self.directory, alphas=[0.0, 0.5, 1.0])
+        self.assertNotEqual(coarse.key(self.data), cache.key(self.data))
+
+    def test_pj_heuristic_follows_the_same_trajectory(self):
+        Simulation.condition_factors = {"weather": {"factor": 0.2}, "traffic": {"factor": 0.3}}
+        cache = ConstructionCache(self.directory)
+        results = []
+        for kwargs in ({}, {"cache": cache}, {"cache": cache}):
+            random_seed(self.seed)
+            np_random.seed(self.seed)
+            with fake_clock():
+                OBD, OBS = pj_heuristic(self.test, self.data, Simulation.simulation, **kwargs)
+            results.append((OBD.reward, OBD.reward_after, [str(r) for r in OBS.routes]))
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from random import seed as random_seed
+from unittest import mock
+
+from numpy import random as np_random
+
+from slh_framework.algorithms import (
+    Checkpoint,
+    Surrogate,
+    pj_heuristic,
+    simulated_annealing_heuristic,
+)
+from slh_framework.datasets import TestInstance, tests
+from slh_framework.simulations import MonteCarlo as Simulation
+
+from helpers import fake_clock
+
+
+class KeepAllCheckpoint(Checkpoint):
+    """Keeps a copy of every snapshot so the run can be resumed from any of them."""
+
+    saved = 0
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.saved += 1
+        shutil.copy(self.path, f"{self.path}.{self.saved}")
+
+
+class TestCheckpoint(unittest.TestCase):
+    seed = 1025747
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "run.npz")
+        self.test = TestInstance("p1.2.r", max_time=40, seed=self.seed)
+        self.test.instance_data = tests["p1.2.r"].instance_data
+        Simulation.condition_factors = {
+            "weather": {"factor": 0.2},
+            "traffic": {"factor": 0.3},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_heuristic(self, checkpoint, resume=False, heuristic=pj_heuristic, **kwargs):
+        with fake_clock():
+            return heuristic(
+                self.test,
+                self.test.instance_data,
+                Simulation.simulation,
+                checkpoint=checkpoint,
+                resume=resume,
+                **kwargs,
+            )
+
+    def test_resume_follows_the_same_trajectory(self):
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        checkpoint = KeepAllCheckpoint(self.path, interval=10)
+        OBD, OBS = self.run_heuristic(checkpoint)
+        self.assertGreater(checkpoint.saved, 2)
+
+        for saved in (1, 2, checkpoint.saved):
+            # a different seed proves the random states come from the checkpoint
+            random_seed(0)
+            np_random.seed(0)
+            resumed = Checkpoint(f"{self.path}.{saved}")
+            resumed_OBD, resumed_OBS = self.run_heuristic(resumed, resume=True)
+            self.assertEqual(resumed_OBD.reward, OBD.reward)
+            self.assertEqual(resumed_OBD.reward_after, OBD.reward_after)
+            self.assertEqual(resumed_OBS.reward_after, OBS.reward_after)
+            self.assertEqual(
+                [str(route) for route in resumed_OBS.routes],
+                [str(route) for route in OBS.routes],
+            )
+
+    def test_simulated_annealing_resume_follows_the_same_trajectory(self):
+        self.test.initial_temp, self.test.cooling_rate, self.test.min_temp = 10.0, 0.95, 0.01
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        checkpoint = KeepAllCheckpoint(self.path, interval=10)
+        best = self.run_heuristic(checkpoint, heuristic=simulated_annealing_heuristic)
+        self.assertGreater(checkpoint.saved, 2)
+
+        for saved in (1, 2, checkpoint.saved):
+            random_seed(0)
+            np_random.seed(0)
+            resumed = self.run_heuristic(
+                Checkpoint(f"{self.path}.{saved}"),
+                resume=True,
+                heuristic=simulated_annealing_heuristic,
+            )
+            self.assertEqual(resumed.reward, best.reward)
+            self.assertEqual(resumed.reward_after, best.reward_after)
+            self.assertEqual(
+                [str(route) for route in resumed.routes],
+                [str(route) for route in best.routes],
+            )
+
+    def test_resume_checks_instance(self):
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        self.run_heuristic(Checkpoint(self.path, interval=10))
+        self.test.seed += 1
+        with self.assertRaises(ValueError):
+            self.run_heuristic(Checkpoint(self.path), resume=True)
+
+    def test_resume_checks_settings(self):
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        self.run_heuristic(Checkpoint(self.path, interval=10))
+        for setting, value in (("max_time", 80), ("var_level", 0.5)):
+            with self.subTest(setting=setting), mock.patch.object(self.test, setting, value):
+                with self.assertRaises(ValueError):
+                    self.run_heuristic(Checkpoint(self.path), resume=True)
+
+    def test_resume_with_surrogate_needs_its_state(self):
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        self.run_heuristic(Checkpoint(self.path, interval=10))
+        with self.assertRaisesRegex(ValueError, "without a surrogate"):
+            self.run_heuristic(Checkpoint(self.path), resume=True, surrogate=Surrogate())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import TestInstance, tests
+
+from helpers import describe_solution
+
+
+class TestStatelessConstruction(unittest.TestCase):
+    def setUp(self):
+        self.test = TestInstance("p3.4.k", seed=1025747)
+        data = tests["p3.4.k"].instance_data
+        self.fleet_size, self.route_max_cost = data["fleet_size"], data["route_max_cost"]
+        self.nodes = HeuristicUtils.to_node_list(data["node_list"])
+        self.efficiency_list = HeuristicUtils.generate_efficiency_list(self.nodes, 0.5)
+
+    def merge(self, br=False):
+        return HeuristicUtils.merge_routes(
+            self.test, self.fleet_size, self.route_max_cost, self.nodes, self.efficiency_list, br
+        )
+
+    def test_constructions_do_not_alter_earlier_solutions(self):
+        order = list(self.efficiency_list)
+        first = self.merge()
+        expected = describe_solution(first)
+        random.seed(3)
+        for _ in range(5):
+            self.merge(br=True)
+        self.assertEqual(describe_solution(first), expected)
+        self.assertEqual(describe_solution(self.merge()), expected)
+        self.assertEqual(self.efficiency_list, order)
+        self.assertFalse(any(hasattr(node, "in_route") for node in self.nodes))
+
+    def test_concurrent_constructions(self):
+        expected = describe_solution(self.merge())
+        with ThreadPoolExecutor(4) as executor:
+            solutions = list(executor.map(lambda _: self.merge(), range(8)))
+        self.assertEqual([describe_solution(solution) for solution in solutions], [expected] * 8)
+
+    def test_modify_solution_leaves_the_current_solution_alone(self):
+        current = self.merge()
+        expected = describe_solution(current)
+        random.seed(5)
+        for _ in range(20):
+            new = HeuristicUtils.modify_solution(
+                current, self.fleet_size, self.route_max_cost, self.nodes, self.efficiency_list
+            )
+            self.assertEqual(
+                sorted(e.end.id_ for r in new.routes for e in r.edges),
+                sorted(e.end.id_ for r in current.routes for e in r.edges),
+            )
+        self.assertEqual(describe_solution(current), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from slh_framework import datasets
+from slh_framework.datasets import (
+    NumpyTxtParser,
+    TestInstance,
+    TsplibParser,
+    TxtFileParser,
+    get_parser,
+)
+
+
+TSPLIB_INSTANCE = """NAME : tiny
+TYPE : OP
+DIMENSION : 4
+COST_LIMIT : 50
+VEHICLES : 2
+EDGE_WEIGHT_TYPE : EUC_2D
+NODE_COORD_SECTION
+1 0 0
+2 3 4
+3 6 8
+4 1 1
+NODE_SCORE_SECTION
+1 0
+2 10
+3 20
+4 5
+DEPOT_SECTION
+2
+-1
+EOF
+"""
+
+
+class TestParsers(unittest.TestCase):
+    def test_numpy_parser_matches_line_parser(self):
+        for name in ("p1.2.a", "p4.4.t", "p7.3.k"):
+            filepath = os.path.join(os.path.dirname(datasets.__file__), f"{name}.txt")
+            legacy, bulk = TxtFileParser(filepath), NumpyTxtParser(filepath)
+            legacy.parse_file()
+            bulk.parse_file()
+            for key in ("number_of_nodes", "fleet_size", "route_max_cost"):
+                self.assertEqual(legacy.data[key], bulk.data[key])
+            np.testing.assert_array_equal(
+                np.array(legacy.data["node_list"]), bulk.data["node_list"]
+            )
+
+    def test_tsplib_parser(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, "tiny.op")
+            with open(filepath, "w") as file:
+                file.write(TSPLIB_INSTANCE)
+            self.assertIs(get_parser(filepath), TsplibParser)
+            test = TestInstance(filename=filepath)
+
+        self.assertEqual(test.instance_name, "tiny")
+        data = test.instance_data
+        self.assertEqual(data["number_of_nodes"], 5)
+        self.assertEqual(data["fleet_size"], 2)
+        self.assertEqual(data["route_max_cost"], 50.0)
+        # the depot (node 2) is both start and finish and carries no reward
+        np.testing.assert_array_equal(data["node_list"][0], [3, 4, 0])
+        np.testing.assert_array_equal(data["node_list"][-1], [3, 4, 0])
+        np.testing.assert_array_equal(data["node_list"][1:-1, 2], [0, 20, 5])
+
+    def test_unknown_parser(self):
+        with self.assertRaises(ValueError):
+            get_parser("instance.csv")
+        with self.assertRaises(ValueError):
+            get_parser("instance.txt", "not_a_parser")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from unittest import mock
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import tests
+from slh_framework.graph import Renderer, draw_solution
+from slh_framework.graph.rendering import snapshot
+
+
+class TestRendering(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        data = tests["p1.2.r"].instance_data
+        nodes = HeuristicUtils.to_node_list(data["node_list"])
+        _, self.solution = HeuristicUtils.generate_initial_solution(
+            data, data["fleet_size"], data["route_max_cost"], nodes
+        )
+
+    def test_all_routes_on_one_figure(self):
+        figure = draw_solution(self.solution, costs=False)
+        ax = figure.axes[0]
+        arrows = sum(len(quiver.U) for quiver in ax.collections if hasattr(quiver, "U"))
+        self.assertEqual(arrows, sum(len(route.edges) for route in self.solution.routes))
+        self.assertEqual(len(ax.get_legend().get_texts()), len(self.solution.routes))
+
+    def test_snapshot_is_detached_from_the_solution(self):
+        data = snapshot(self.solution)
+        route = self.solution.routes[0]
+        self.assertEqual(data["routes"][0]["ids"][1:], [edge.end.id_ for edge in route.edges])
+        route.edges[0].end.x += 100
+        self.assertNotEqual(data["routes"][0]["coordinates"][1, 0], route.edges[0].end.x)
+
+    def test_renderer_writes_files_in_background(self):
+        routes = self.solution.routes
+        filenames = [os.path.join(self.directory, f"{i}.png") for i in range(len(routes) + 1)]
+        with Renderer(max_workers=2) as renderer:
+            renderer.submit(self.solution, filenames[0])
+            for route, filename in zip(routes, filenames[1:]):
+                renderer.submit(route, filename)
+            self.assertEqual(renderer.wait(), filenames)
+        for filename in filenames:
+            self.assertGreater(os.path.getsize(filename), 0)
+
+    def test_route_draw_without_networkx(self):
+        filename = os.path.join(self.directory, "route.png")
+        with mock.patch.dict(sys.modules, {"networkx": None}):
+            self.solution.routes[0].draw(filename)
+        self.assertTrue(os.path.exists(filename))
+
+
+if __name__ == "__main__":
+    unittest.main()
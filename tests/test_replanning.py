@@ -0,0 +1,152 @@
+import unittest
+
+from copy import deepcopy
+from random import seed as random_seed
+from unittest import mock
+
+import numpy as np
+
+from numpy import random as np_random
+
+from slh_framework.algorithms import Plan, SharedInstance, pj_heuristic, replan
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import TestInstance, tests
+from slh_framework.simulations import MonteCarlo as Simulation
+
+from helpers import describe_solution, fake_clock
+
+
+class TestReplanning(unittest.TestCase):
+    seed = 1025747
+
+    def setUp(self):
+        self.test = TestInstance("p1.2.r", max_time=20, seed=self.seed)
+        self.data = deepcopy(tests["p1.2.r"].instance_data)
+        self.conditions = {"weather": {"factor": 0.2}, "traffic": {"factor": 0.3}}
+        Simulation.condition_factors = self.conditions
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        patcher = fake_clock()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.plan = Plan()
+        pj_heuristic(self.test, self.data, Simulation.simulation, plan=self.plan)
+
+    def tearDown(self):
+        Simulation.condition_factors = self.conditions
+
+    def assert_feasible(self, solution, data):
+        self.assertLessEqual(len(solution.routes), data["fleet_size"])
+        rewards = [row[2] for row in data["node_list"]]
+        for route in solution.routes:
+            self.assertLessEqual(route.cost, data["route_max_cost"])
+            self.assertAlmostEqual(route.reward, sum(rewards[e.end.id_] for e in route.edges))
+
+    def test_plan_is_filled(self):
+        self.assertTrue(self.plan.ready)
+        self.assertIn(self.plan.alpha, np.linspace(0, 1, 11).tolist())
+        self.assertIn(self.plan.OBS, [self.plan.OBD, *self.plan.elite_solutions])
+
+    def test_filled_plan_conflicts_with_other_sources(self):
+        with SharedInstance.publish(self.data) as shared:
+            with self.assertRaisesRegex(ValueError, "plan, shared"):
+                pj_heuristic(
+                    self.test, self.data, Simulation.simulation, plan=self.plan, shared=shared
+                )
+            # an empty plan is filled from the shared construction
+            plan = Plan()
+            pj_heuristic(self.test, self.data, Simulation.simulation, plan=plan, shared=shared)
+        self.assertEqual(plan.alpha, shared.alpha)
+
+    def test_replan_after_changes(self):
+        data = deepcopy(self.data)
+        data["route_max_cost"] *= 0.8
+        for row in data["node_list"][1:10]:
+            row[2] += 5
+        with mock.patch.object(
+            HeuristicUtils, "generate_initial_construction", side_effect=AssertionError
+        ):
+            OBD, OBS = replan(
+                self.test,
+                data,
+                Simulation.simulation,
+                self.plan,
+                condition_factors={"weather": {"factor": 0.5}, "traffic": {"factor": 0.5}},
+                simulation_class=Simulation,
+                max_time=5,
+            )
+        self.assertIs(Simulation.condition_factors, self.conditions)
+        self.assertIs(self.plan.OBD, OBD)
+        self.assertIs(self.plan.OBS, OBS)
+        for solution in (OBD, OBS):
+            self.assert_feasible(solution, data)
+        efficiencies = [edge.efficiency for edge in self.plan.efficiency_list]
+        self.assertEqual(efficiencies, sorted(efficiencies, reverse=True))
+
+    def test_replan_leaves_earlier_solutions_alone(self):
+        OBD = self.plan.OBD
+        edges = [edge for route in OBD.routes for edge in route.edges]
+
+        def state():
+            return (
+                describe_solution(OBD),
+                [route.reward for route in OBD.routes],
+                [sum(edge.end.reward for edge in route.edges) for route in OBD.routes],
+                [(edge.end.x, edge.end.y, edge.efficiency) for edge in edges],
+            )
+
+        expected = state()
+        data = deepcopy(self.data)
+        for row in data["node_list"][1:4]:
+            row[2] += 50
+        replan(self.test, data, Simulation.simulation, self.plan, max_time=2)
+        self.assertEqual(state(), expected)
+        data["node_list"][3][0] += 1.5
+        replan(self.test, data, Simulation.simulation, self.plan, max_time=2)
+        self.assertEqual(state(), expected)
+        self.assertFalse(set(map(id, edges)) & set(map(id, self.plan.efficiency_list)))
+
+    def test_replan_after_moves(self):
+        data = deepcopy(self.data)
+        data["node_list"][3][0] += 1.5
+        OBD, _ = replan(self.test, data, Simulation.simulation, self.plan, max_time=5)
+        self.assert_feasible(OBD, data)
+        moved = self.plan.nodes[3]
+        self.assertEqual(moved.x, data["node_list"][3][0])
+        self.assertTrue(
+            all(edge.origin.id_ != 3 or edge.origin is moved for edge in self.plan.efficiency_list)
+        )
+
+    def test_replan_with_a_plain_simulation(self):
+        factors = []
+
+        def simulation(solution, max_iterations, route_max_cost, var_level):
+            factors.append(Simulation.condition_factors["weather"]["factor"])
+            Simulation.simulation(solution, max_iterations, route_max_cost, var_level)
+
+        new_conditions = {"weather": {"factor": 0.5}, "traffic": {"factor": 0.5}}
+        with self.assertRaises(ValueError):
+            replan(self.test, self.data, simulation, self.plan, condition_factors=new_conditions)
+        replan(
+            self.test,
+            self.data,
+            simulation,
+            self.plan,
+            condition_factors=new_conditions,
+            simulation_class=Simulation,
+            max_time=2,
+        )
+        self.assertEqual(set(factors), {0.5})
+        self.assertIs(Simulation.condition_factors, self.conditions)
+
+    def test_replan_checks_node_count(self):
+        data = deepcopy(self.data)
+        data["node_list"] = np.delete(data["node_list"], -2, axis=0)
+        with self.assertRaises(ValueError):
+            replan(self.test, data, Simulation.simulation, Plan())
+        with self.assertRaises(ValueError):
+            replan(self.test, data, Simulation.simulation, self.plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
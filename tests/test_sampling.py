@@ -0,0 +1,147 @@
+import statistics
+import unittest
+
+import numpy as np
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import tests
+from slh_framework.graph import Route
+from slh_framework.simulations import MonteCarlo, Solution, samplers
+from slh_framework.simulations.uncertainty import (
+    LogNormal,
+    UncertaintyModel,
+    gammainc,
+    gammaincinv,
+    ndtri,
+    uncertainty_models,
+)
+
+
+class TestSamplers(unittest.TestCase):
+    def test_points_are_in_the_open_unit_hypercube(self):
+        for name, sampler in samplers.items():
+            points = sampler().uniforms(100, 7, np.random.default_rng(0))
+            self.assertEqual(points.shape, (100, 7), name)
+            self.assertTrue(((points > 0) & (points < 1)).all(), name)
+            self.assertEqual(sampler().uniforms(10, 0, np.random.default_rng(0)).shape, (10, 0))
+
+    def test_structure(self):
+        random_state = np.random.default_rng(1)
+        pairs = samplers["antithetic"]().uniforms(6, 3, random_state).reshape(3, 2, 3)
+        np.testing.assert_allclose(pairs.sum(axis=1), 1.0)
+        strata = np.floor(samplers["latin_hypercube"]().uniforms(16, 4, random_state) * 16)
+        self.assertTrue((np.sort(strata, axis=0) == np.arange(16)[:, None]).all())
+        # the unscrambled sequences start with their textbook points
+        sobol = samplers["sobol"](scramble=False).uniforms(4, 3) - 0.5 / 2**32
+        np.testing.assert_allclose(
+            sobol, [[0, 0, 0], [0.5, 0.5, 0.5], [0.75, 0.25, 0.25], [0.25, 0.75, 0.75]]
+        )
+        # inputs beyond the direction numbers table are padded with a Latin hypercube
+        padded = samplers["sobol"](scramble=False).uniforms(4, 1030)
+        np.testing.assert_array_equal(
+            padded[:, :1024], samplers["sobol"](scramble=False).uniforms(4, 1024)
+        )
+        strata = np.sort(padded[:, 1024:] * 4 // 1, axis=0).T
+        np.testing.assert_array_equal(strata, [[0, 1, 2, 3]] * 6)
+        with self.assertRaises(ValueError):
+            samplers["sobol"]().directions(1025)
+        halton = samplers["halton"](scramble=False).uniforms(3, 2)
+        np.testing.assert_allclose(halton, [[1 / 8, 1 / 6], [5 / 8, 1 / 2], [3 / 8, 5 / 6]])
+
+    def test_ndtri_matches_the_standard_library(self):
+        p = np.array([1e-300, 1e-10, 0.01, 0.2, 0.5, 0.9, 1 - 1e-10])
+        expected = [statistics.NormalDist().inv_cdf(x) for x in p.tolist()]
+        np.testing.assert_allclose(ndtri(p), expected, rtol=1e-14)
+
+    def test_inverse_cdfs_match_the_samplers(self):
+        costs, uniforms = [2.0, 7.5], np.random.default_rng(2).random((20000, 2))
+        models = [
+            LogNormal(),
+            uncertainty_models["gamma"](),
+            uncertainty_models["truncated_normal"](),
+            uncertainty_models["empirical"](np.random.default_rng(0).uniform(0.9, 1.1, 1000)),
+        ]
+        for model in models:
+            params = model.parameters(costs, 0.5)
+            quantiles = np.quantile(model.ppf(params, uniforms), [0.1, 0.5, 0.9], axis=0)
+            expected = np.quantile(
+                model.sample(params, 20000, np.random.default_rng(3)), [0.1, 0.5, 0.9], axis=0
+            )
+            np.testing.assert_allclose(quantiles, expected, rtol=0.05, err_msg=repr(model))
+
+    def test_gamma_inverse_cdf(self):
+        a = np.array([0.05, 0.7, 1.0, 3.5, 80.0, 900.0])
+        p = np.array([2**-53, 1e-6, 0.3, 0.5, 0.9, 1 - 2**-53])
+        x = gammaincinv(a[:, None], p[None])
+        self.assertTrue((np.diff(x, axis=1) > 0).all())
+        lower = gammainc(a[:, None], x)
+        np.testing.assert_allclose(lower[:, 1:-1], np.tile(p[1:-1], (len(a), 1)), rtol=1e-10)
+        # the exponential distribution has a closed form
+        np.testing.assert_allclose(gammaincinv(1.0, p[1:-1]), -np.log1p(-p[1:-1]), rtol=1e-12)
+        self.assertEqual(gammaincinv(0.0, 0.5), 0.0)
+
+
+class TestMonteCarloSampler(unittest.TestCase):
+    def setUp(self):
+        MonteCarlo.condition_factors = {"weather": {"factor": 0.2}, "traffic": {"factor": 0.3}}
+        self.addCleanup(setattr, MonteCarlo, "sampler", None)
+        data = tests["p3.4.k"].instance_data
+        self.route_max_cost = data["route_max_cost"]
+        nodes = HeuristicUtils.to_node_list(data["node_list"])
+        _, self.solution = HeuristicUtils.generate_initial_solution(
+            data, data["fleet_size"], self.route_max_cost, nodes
+        )
+
+    def estimate(self, iterations, seed):
+        np.random.seed(seed)
+        MonteCarlo.simulation(self.solution, iterations, self.route_max_cost, 1.0)
+        return self.solution.reward_after
+
+    def test_samplers_reduce_the_error(self):
+        reference = self.estimate(2**15, 0)
+        rmse = {}
+        for name in ("random", "sobol"):
+            MonteCarlo.sampler = samplers[name]()
+            errors = [self.estimate(256, seed) - reference for seed in range(1, 21)]
+            rmse[name] = np.sqrt(np.mean(np.square(errors)))
+        self.assertLess(rmse["random"], 0.05 * reference)
+        self.assertLess(rmse["sobol"], rmse["random"])
+
+    def test_models_without_inverse_cdf_are_sampled(self):
+        class Uniform(UncertaintyModel):
+            def parameters(self, costs, var_level):
+                return np.asarray(costs, dtype=float).reshape(-1, 1)
+
+            def sample(self, params, size=None, random_state=np.random):
+                shape = None if size is None else (size, len(params))
+                return params[:, 0] * random_state.uniform(0.5, 1.5, shape)
+
+        self.addCleanup(setattr, MonteCarlo, "uncertainty_model", MonteCarlo.uncertainty_model)
+        MonteCarlo.uncertainty_model = Uniform()
+        reference = self.estimate(2**14, 0)
+        MonteCarlo.sampler = samplers["sobol"]()
+        self.assertAlmostEqual(self.estimate(1024, 1), reference, delta=0.02 * reference)
+
+    def test_sobol_runs_any_number_of_inputs(self):
+        data = tests["p7.4.t"].instance_data
+        nodes = HeuristicUtils.to_node_list(data["node_list"])
+        efficiency_list = HeuristicUtils.generate_efficiency_list(nodes, 0.5)
+        solution = Solution()
+        for start in range(0, 3000, 100):
+            route = Route()
+            route.edges = efficiency_list[start : start + 100]
+            solution.routes.append(route)
+        MonteCarlo.sampler = samplers["sobol"]()
+        MonteCarlo.compile_edges(solution, 1.0)
+        edges, _, _ = MonteCarlo.stack_solutions([solution])
+        self.assertGreater(MonteCarlo.random_dimensions(edges), 1024)
+        MonteCarlo.simulation(solution, 64, data["route_max_cost"], 1.0)
+        self.assertTrue(np.isfinite(solution.reward_after))
+
+    def test_runs_are_reproducible(self):
+        MonteCarlo.sampler = samplers["halton"]()
+        self.assertEqual(self.estimate(100, 4), self.estimate(100, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
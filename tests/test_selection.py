@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+from slh_framework.algorithms import OCBA, SuccessiveHalving
+from slh_framework.simulations import Solution
+
+
+class NoisySimulation:
+    """Stand-in simulation: each run returns the true reward plus normal noise."""
+
+    def __init__(self, rewards, std, seed):
+        self.rewards = rewards
+        self.std = std
+        self.rng = np.random.default_rng(seed)
+        self.runs = 0
+
+    def __call__(self, solution, max_iterations, route_max_cost, var_level):
+        reward = self.rewards[id(solution)]
+        solution.reward_after = reward + self.rng.normal(0, self.std, max_iterations).mean()
+        self.runs += max_iterations
+
+
+class ScriptedSimulation:
+    """Stand-in simulation returning, call after call, a scripted batch mean."""
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.calls = {}
+
+    def __call__(self, solution, max_iterations, route_max_cost, var_level):
+        script = self.scripts[id(solution)]
+        call = self.calls.get(id(solution), 0)
+        solution.reward_after = script(call)
+        self.calls[id(solution)] = call + 1
+
+
+class TestSelection(unittest.TestCase):
+    long_sim = 1000
+    true_rewards = [100.0, 120.0, 95.0, 131.0, 60.0, 128.0, 70.0, 80.0, 110.0, 90.0, 125.0]
+
+    def select(self, selection, seed):
+        candidates = [Solution() for _ in self.true_rewards]
+        simulation = NoisySimulation(
+            {id(c): r for c, r in zip(candidates, self.true_rewards)}, 40.0, seed
+        )
+        if selection is None:
+            # reference: every candidate gets a full long_sim evaluation
+            for candidate in candidates:
+                simulation(candidate, self.long_sim, 10.0, 1.0)
+            best = max(candidates, key=lambda candidate: candidate.reward_after)
+        else:
+            best = selection.select(candidates, simulation, self.long_sim, 10.0, 1.0)
+        return candidates.index(best), simulation.runs
+
+    def test_selects_best_with_fraction_of_budget(self):
+        seeds = range(50)
+        full_budget = self.long_sim * len(self.true_rewards)
+        reference = sum(self.select(None, seed)[0] == 3 for seed in seeds)
+        for selection in (OCBA(), SuccessiveHalving()):
+            correct = 0
+            for seed in seeds:
+                index, runs = self.select(selection, seed)
+                correct += index == 3
+                self.assertLessEqual(runs, 0.4 * full_budget)
+                self.assertGreaterEqual(selection.confidence, 0.0)
+            self.assertGreaterEqual(correct, reference - 2, selection)
+
+    def test_ocba_favours_close_contenders(self):
+        selection = OCBA()
+        self.select(selection, 0)
+        # the close contenders (131, 128, 125) get more runs than the clear losers
+        self.assertGreater(selection.runs[[3, 5, 10]].min(), selection.runs[[4, 6]].max())
+        self.assertGreater(selection.confidence, 0.5)
+
+    def test_halving_never_selects_an_eliminated_candidate(self):
+        candidates = [Solution() for _ in range(4)]
+        # the survivors of the first round regress below the eliminated candidate,
+        # whose mean rests on the fewest runs
+        scripts = [
+            lambda call: 100.0,
+            lambda call: 102.0 if call < 22 else 90.0,
+            lambda call: 101.0 if call < 22 else 90.0,
+            lambda call: 50.0,
+        ]
+        simulation = ScriptedSimulation({id(c): s for c, s in zip(candidates, scripts)})
+        selection = SuccessiveHalving()
+        best = selection.select(candidates, simulation, self.long_sim, 10.0, 1.0)
+        self.assertEqual(simulation.calls[id(candidates[0])], 22)
+        self.assertGreater(candidates[0].reward_after, candidates[1].reward_after)
+        self.assertEqual(selection.survivors, [1])
+        self.assertIs(best, candidates[1])
+
+    def test_single_candidate(self):
+        candidate = Solution()
+        simulation = NoisySimulation({id(candidate): 50.0}, 1.0, 0)
+        best = OCBA().select([candidate], simulation, 200, 10.0, 1.0)
+        self.assertIs(best, candidate)
+        self.assertEqual(simulation.runs, 200)
+        self.assertAlmostEqual(candidate.reward_after, 50.0, delta=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import multiprocessing
+import pickle
+import unittest
+
+from copy import copy
+from random import seed as random_seed
+
+from numpy import random as np_random
+
+from slh_framework.algorithms import SharedInstance, pj_heuristic
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import TestInstance, tests
+from slh_framework.simulations import MonteCarlo as Simulation
+
+from helpers import describe_edges, fake_clock
+
+
+def worker(shared):
+    alpha, nodes, efficiency_list = shared.construction()
+    return alpha, shared.distances.flags.owndata, describe_edges(efficiency_list[:50])
+
+
+class TestSharedInstance(unittest.TestCase):
+    seed = 1025747
+
+    def setUp(self):
+        self.test = TestInstance("p1.2.r", max_time=20, seed=self.seed)
+        self.data = tests["p1.2.r"].instance_data
+        self.shared = SharedInstance.publish(self.data)
+        self.addCleanup(self.shared.unlink)
+
+    def test_construction_matches_alpha_sweep(self):
+        nodes = HeuristicUtils.to_node_list(self.data["node_list"])
+        alpha, efficiency_list, _ = HeuristicUtils.generate_initial_construction(
+            self.data, self.data["fleet_size"], self.data["route_max_cost"], nodes
+        )
+        attached = SharedInstance.attach(self.shared.name)
+        self.addCleanup(attached.close)
+        shared_alpha, shared_nodes, shared_efficiency_list = attached.construction()
+        self.assertEqual(shared_alpha, alpha)
+        self.assertEqual(describe_edges(shared_efficiency_list), describe_edges(efficiency_list))
+        for edge in shared_efficiency_list:
+            self.assertIs(edge.inverse_edge.inverse_edge, edge)
+        self.assertEqual(
+            [(n.depot_to_node.cost, n.node_to_depot.cost) for n in shared_nodes[1:-1]],
+            [(n.depot_to_node.cost, n.node_to_depot.cost) for n in nodes[1:-1]],
+        )
+
+    def test_one_mapping_per_process(self):
+        attached = SharedInstance.attach(self.shared.name)
+        self.assertIs(SharedInstance.attach(self.shared.name), attached)
+        self.assertIs(pickle.loads(pickle.dumps(self.shared)), attached)
+        attached.close()
+        self.assertIsNot(SharedInstance.attach(self.shared.name), attached)
+        SharedInstance.attach(self.shared.name).close()
+
+    def test_edges_are_built_once_per_process(self):
+        _, nodes, efficiency_list = self.shared.construction()
+        self.assertIs(self.shared.construction()[2], efficiency_list)
+        edge = efficiency_list[0]
+        self.assertIs(efficiency_list[0], edge)
+        self.assertIs(edge.inverse_edge.inverse_edge, edge)
+        self.assertIn(edge.inverse_edge, efficiency_list)
+        working = copy(efficiency_list)
+        working.remove(edge.inverse_edge)
+        self.assertIs(working.pop(0), edge)
+        self.assertNotIn(edge, working)
+        self.assertNotIn(edge.inverse_edge, working)
+        other = next(e for e in efficiency_list[1:] if e is not edge.inverse_edge)
+        self.assertIn(other, working)
+        self.assertNotIn(nodes[1].depot_to_node, working)
+
+        solution = HeuristicUtils.merge_routes(
+            self.test, self.data["fleet_size"], self.data["route_max_cost"], nodes, efficiency_list
+        )
+        Simulation.compile_edges(solution, 1.0)
+        # the compiled state stays on the edges for the next runs of the process
+        lookup = HeuristicUtils.edge_lookup(nodes, efficiency_list)
+        for route in solution.routes:
+            for e in route.edges:
+                self.assertIs(lookup[(e.origin.id_, e.end.id_)], e)
+                self.assertIsNotNone(e.compiled_for)
+
+    def test_pj_heuristic_follows_the_same_trajectory(self):
+        Simulation.condition_factors = {"weather": {"factor": 0.2}, "traffic": {"factor": 0.3}}
+        results = []
+        for shared in (None, self.shared):
+            random_seed(self.seed)
+            np_random.seed(self.seed)
+            with fake_clock():
+                OBD, OBS = pj_heuristic(
+                    self.test, self.shared.instance_data, Simulation.simulation, shared=shared
+                )
+            results.append((OBD.reward, OBD.reward_after, [str(r) for r in OBS.routes]))
+        self.assertEqual(results[0], results[1])
+
+    def test_workers_attach_without_copies(self):
+        with multiprocessing.get_context("spawn").Pool(2) as pool:
+            results = pool.map(worker, [self.shared] * 2)
+        expected = worker(self.shared)
+        for alpha, owndata, edges in results:
+            self.assertFalse(owndata)
+            self.assertEqual((alpha, edges), (expected[0], expected[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
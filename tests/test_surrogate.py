@@ -0,0 +1,56 @@
+import unittest
+
+from slh_framework.algorithms import Surrogate
+from slh_framework.graph import Edge, Node, Route
+from slh_framework.simulations import Solution
+
+
+def make_solution(reward, cost, reward_after):
+    start, node, finish = Node(0, 0.0, 0.0, 0.0), Node(1, 1.0, 0.0, reward), Node(5, 2.0, 0.0, 0.0)
+    route = Route()
+    route.edges = [Edge(start, node, cost / 2), Edge(node, finish, cost / 2)]
+    route.cost, route.reward = cost, reward
+    solution = Solution()
+    solution.routes = [route]
+    solution.cost, solution.reward, solution.reward_after = cost, reward, reward_after
+    return solution
+
+
+class TestSurrogate(unittest.TestCase):
+    route_max_cost = 10.0
+
+    def test_warm_up_always_simulates(self):
+        surrogate = Surrogate(warm_up=3)
+        for _ in range(3):
+            solution = make_solution(10.0, 9.0, 0.0)
+            self.assertTrue(surrogate.should_simulate(solution, self.route_max_cost, 100.0))
+            surrogate.update(solution, self.route_max_cost)
+        self.assertEqual(surrogate.simulated, 3)
+
+    def test_screens_out_losing_candidates(self):
+        surrogate = Surrogate(z=0.0, warm_up=5, explore_every=0)
+        # tighter routes lose more of their reward in the stochastic environment
+        for reward in range(10, 60, 5):
+            for cost in (2.0, 5.0, 8.0):
+                reward_after = reward * (self.route_max_cost - cost) / self.route_max_cost
+                surrogate.update(make_solution(reward, cost, reward_after), self.route_max_cost)
+
+        promising = make_solution(50.0, 2.0, 0.0)
+        losing = make_solution(50.0, 9.0, 0.0)
+        self.assertAlmostEqual(surrogate.predict(promising, self.route_max_cost), 40.0, 1)
+        self.assertTrue(surrogate.should_simulate(promising, self.route_max_cost, 30.0))
+        self.assertFalse(surrogate.should_simulate(losing, self.route_max_cost, 30.0))
+        self.assertEqual(surrogate.skipped, 1)
+
+    def test_exploration(self):
+        surrogate = Surrogate(z=0.0, warm_up=1, explore_every=2)
+        surrogate.update(make_solution(10.0, 5.0, 1.0), self.route_max_cost)
+        decisions = [
+            surrogate.should_simulate(make_solution(10.0, 5.0, 0.0), self.route_max_cost, 100.0)
+            for _ in range(4)
+        ]
+        self.assertEqual(decisions, [False, True, False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
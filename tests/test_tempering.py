@@ -0,0 +1,79 @@
+import multiprocessing
+import unittest
+
+from random import seed as random_seed
+from unittest import mock
+
+from numpy import random as np_random
+
+from slh_framework.algorithms import Trace, parallel_tempering_heuristic, tempering
+from slh_framework.datasets import TestInstance, tests
+from slh_framework.simulations import MonteCarlo as Simulation
+from slh_framework.simulations.uncertainty import EdgeType, Gamma, NodeEdgeTypePolicy
+
+from helpers import fake_clock
+
+
+class TestParallelTempering(unittest.TestCase):
+    seed = 1025747
+
+    def setUp(self):
+        self.test = TestInstance("p1.2.r", max_time=6, seed=self.seed, short_sim=50, long_sim=200)
+        self.test.initial_temp, self.test.cooling_rate, self.test.min_temp = 10.0, 0.95, 0.5
+        self.data = tests["p1.2.r"].instance_data
+        Simulation.condition_factors = {"weather": {"factor": 0.2}, "traffic": {"factor": 0.3}}
+
+    def run_heuristic(self, **kwargs):
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        with fake_clock("slh_framework.algorithms.tempering"):
+            return parallel_tempering_heuristic(
+                self.test, self.data, Simulation.simulation, chains=3, exchange_every=5, **kwargs
+            )
+
+    def test_reproducible_whatever_the_number_of_processes(self):
+        trace = Trace()
+        best = self.run_heuristic(processes=0, trace=trace)
+        for processes in (1, 3):
+            other = self.run_heuristic(processes=processes)
+            self.assertEqual(other.reward_after, best.reward_after)
+            self.assertEqual([str(r) for r in other.routes], [str(r) for r in best.routes])
+
+        columns = trace.to_arrays()
+        samples = columns["event"] == Trace.SAMPLE
+        self.assertEqual(samples.sum(), self.test.max_time)
+        self.assertEqual(columns["iteration"][samples].tolist(), [5, 10, 15, 20, 25, 30])
+        # the best `reward_after` never decreases and swaps do happen
+        best_rewards = columns["reward_after"][samples]
+        self.assertTrue((best_rewards[1:] >= best_rewards[:-1]).all())
+        self.assertGreater(columns["count"][samples][-1], 0)
+
+    def test_simulation_settings_reach_spawned_workers(self):
+        policy = NodeEdgeTypePolicy({i: EdgeType.STOCHASTIC for i in range(0, 40, 2)})
+        with mock.patch.object(Simulation, "uncertainty_model", Gamma()), mock.patch.object(
+            Simulation, "edge_type_policy", policy
+        ):
+            best = self.run_heuristic(processes=0)
+            spawn = multiprocessing.get_context("spawn")
+            other = self.run_heuristic(processes=1, mp_context=spawn, simulation_class=Simulation)
+        self.assertEqual(other.reward_after, best.reward_after)
+        self.assertEqual([str(r) for r in other.routes], [str(r) for r in best.routes])
+
+    def test_in_process_run_leaves_no_state(self):
+        conditions = Simulation.condition_factors
+        self.run_heuristic(processes=0, simulation_class=Simulation)
+        self.assertIs(Simulation.condition_factors, conditions)
+        self.assertEqual(tempering._worker_context, {})
+
+    def test_seed_changes_the_run(self):
+        best = self.run_heuristic(processes=0)
+        self.test.seed += 1
+        other = self.run_heuristic(processes=0)
+        self.assertNotEqual(
+            [str(r) for r in other.routes] + [other.reward_after],
+            [str(r) for r in best.routes] + [best.reward_after],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
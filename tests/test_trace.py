@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from random import seed as random_seed
+
+import numpy as np
+
+from numpy import random as np_random
+
+from slh_framework.algorithms import Trace, pj_heuristic, simulated_annealing_heuristic
+from slh_framework.datasets import TestInstance, tests
+from slh_framework.simulations import MonteCarlo as Simulation
+
+from helpers import fake_clock
+
+
+class TestTrace(unittest.TestCase):
+    seed = 1025747
+
+    def setUp(self):
+        self.test = TestInstance("p1.2.r", max_time=30, seed=self.seed)
+        self.test.initial_temp, self.test.cooling_rate, self.test.min_temp = 10.0, 0.95, 0.01
+        self.data = tests["p1.2.r"].instance_data
+        Simulation.condition_factors = {"weather": {"factor": 0.2}, "traffic": {"factor": 0.3}}
+
+    def run_heuristic(self, heuristic, **kwargs):
+        random_seed(self.seed)
+        np_random.seed(self.seed)
+        with fake_clock():
+            return heuristic(self.test, self.data, Simulation.simulation, **kwargs)
+
+    def test_ring_buffer_keeps_the_latest_events(self):
+        trace = Trace(capacity=4)
+        for i in range(10):
+            trace.record(Trace.SAMPLE, float(i), i, 0.0, 0.0)
+        self.assertEqual(len(trace), 4)
+        self.assertEqual(trace.dropped, 6)
+        self.assertEqual(trace.to_arrays()["iteration"].tolist(), [6, 7, 8, 9])
+
+    def test_pj_heuristic_trace(self):
+        OBD, OBS = self.run_heuristic(pj_heuristic)
+        trace = Trace(sample_every=5)
+        traced_OBD, traced_OBS = self.run_heuristic(pj_heuristic, trace=trace)
+        # tracing does not change the run
+        self.assertEqual((traced_OBD.reward, traced_OBS.reward_after), (OBD.reward, OBS.reward_after))
+
+        columns = trace.to_arrays()
+        self.assertTrue((np.diff(columns["time"]) >= 0).all())
+        self.assertTrue((np.diff(columns["reward"]) >= 0).all())
+        self.assertEqual(columns["event"][-1], Trace.FINAL)
+        self.assertEqual(columns["reward"][-1], OBD.reward)
+        summary = trace.summary()
+        self.assertEqual(summary["events"]["final"], 1)
+        self.assertEqual(summary["events"]["sample"], len(range(0, columns["iteration"][-1], 5)))
+        self.assertGreater(summary["iterations_per_second"], 0)
+
+        path = os.path.join(tempfile.mkdtemp(), "trace.npz")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        trace.save(path)
+        saved = Trace.load(path)
+        for name, column in columns.items():
+            np.testing.assert_array_equal(saved[name], column)
+        self.assertEqual(saved["event_names"][Trace.OBS], "obs")
+
+    def test_simulated_annealing_trace(self):
+        trace = Trace()
+        best = self.run_heuristic(simulated_annealing_heuristic, trace=trace)
+        columns = trace.to_arrays()
+        steps = columns["event"] == Trace.STEP
+        self.assertTrue((np.diff(columns["value"][steps]) < 0).all())  # cooling
+        self.assertEqual(columns["reward_after"][-1], best.reward)
+        self.assertTrue(0 <= trace.summary()["acceptance_rate"] <= 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+
+from copy import deepcopy
+
+import numpy as np
+
+from slh_framework.algorithms.utils import HeuristicUtils
+from slh_framework.datasets import tests
+from slh_framework.graph import Edge, Node, Route
+from slh_framework.simulations import MonteCarlo, Solution
+from slh_framework.simulations.uncertainty import (
+    EdgeType,
+    Empirical,
+    ModuloEdgeTypePolicy,
+    NodeEdgeTypePolicy,
+    TruncatedNormal,
+    uncertainty_models,
+)
+
+
+class TestUncertaintyModels(unittest.TestCase):
+    costs = np.array([2.0, 7.5, 12.0])
+    var_level = 0.5
+
+    def test_batched_samplers_match_nominal_costs(self):
+        models = [
+            uncertainty_models["lognormal"](),
+            uncertainty_models["gamma"](),
+            uncertainty_models["truncated_normal"](),
+            uncertainty_models["empirical"](np.random.default_rng(0).uniform(0.9, 1.1, 1000)),
+        ]
+        for model in models:
+            params = model.parameters(self.costs, self.var_level)
+            samples = model.sample(params, size=20000, random_state=np.random.default_rng(1))
+            self.assertEqual(samples.shape, (20000, len(self.costs)))
+            self.assertTrue((samples >= 0).all(), model)
+            # the truncated normal is slightly biased upwards by the truncation
+            np.testing.assert_allclose(samples.mean(axis=0), self.costs, rtol=0.1, err_msg=repr(model))
+
+    def test_truncated_normal_far_below_the_truncation_point(self):
+        model = TruncatedNormal(lower=1.0)
+        # no spread, a mean 6 and 50 deviations below `lower`, and a regular edge
+        params = np.array([[-5.0, 0.0], [-5.0, 1.0], [-49.0, 1.0], [10.0, 0.0], [10.0, 2.0]])
+        samples = model.sample(params, size=1000, random_state=np.random.default_rng(2))
+        self.assertTrue(np.isfinite(samples).all())
+        self.assertTrue((samples >= 1.0).all())
+        np.testing.assert_array_equal(samples[:, [0, 2, 3]], [[1.0, 1.0, 10.0]] * 1000)
+        # the tail beyond 6 deviations exceeds `lower` by about 1 / 6 deviation on average
+        self.assertAlmostEqual(samples[:, 1].mean(), 1 + 1 / 6.2, delta=0.02)
+        uniforms = np.random.default_rng(2).random((1000, len(params)))
+        np.testing.assert_array_equal(model.ppf(params, uniforms), samples)
+
+    def test_empirical_from_travel_times(self):
+        model = Empirical.from_travel_times([10.0, 10.0, 20.0], [11.0, 13.0, 24.0], bins=2)
+        samples = model.sample(model.parameters([5.0], self.var_level), size=1000)
+        # ratios are drawn uniformly within the [1.1, 1.3] histogram
+        self.assertTrue(((samples >= 5.5) & (samples <= 6.5)).all())
+
+
+class TestEdgeTypePolicy(unittest.TestCase):
+    def setUp(self):
+        self.nodes = [Node(i, float(i), 0.0, 1.0) for i in range(8)]
+        route = Route()
+        route.edges = [Edge(a, b, 1.0) for a, b in zip(self.nodes, self.nodes[1:])]
+        self.solution = Solution()
+        self.solution.routes = [route]
+
+    def tearDown(self):
+        MonteCarlo.edge_type_policy = ModuloEdgeTypePolicy()
+
+    def types(self):
+        return [edge.type_ for edge in self.solution.routes[0].edges]
+
+    def test_default_policy(self):
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        S, D, T = EdgeType.STOCHASTIC, EdgeType.DYNAMIC, EdgeType.DETERMINISTIC
+        self.assertEqual(self.types(), [T, S, D, S, T, S, T])
+        params = [edge.params for edge in self.solution.routes[0].edges]
+        self.assertEqual([p is not None for p in params], [t == S for t in self.types()])
+
+    def test_policy_change_recompiles_edges(self):
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        MonteCarlo.edge_type_policy = NodeEdgeTypePolicy({3: EdgeType.STOCHASTIC})
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        self.assertEqual(self.types().count(EdgeType.STOCHASTIC), 1)
+        self.assertEqual(self.types()[2], EdgeType.STOCHASTIC)
+
+    def test_in_place_change_recompiles_edges(self):
+        policy = NodeEdgeTypePolicy({3: EdgeType.STOCHASTIC})
+        MonteCarlo.edge_type_policy = policy
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        policy.default = EdgeType.DYNAMIC
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        self.assertEqual(self.types().count(EdgeType.DYNAMIC), 6)
+        policy.types[4] = EdgeType.STOCHASTIC
+        policy.touch()
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        self.assertEqual(self.types().count(EdgeType.STOCHASTIC), 2)
+
+    def test_copies_keep_the_compiled_edges(self):
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        compiled = [edge.compiled_for for edge in self.solution.routes[0].edges]
+        MonteCarlo.edge_type_policy = deepcopy(MonteCarlo.edge_type_policy)
+        MonteCarlo.compile_edges(self.solution, 1.0)
+        self.assertEqual([edge.compiled_for for edge in self.solution.routes[0].edges], compiled)
+        self.assertNotEqual(ModuloEdgeTypePolicy().revision, ModuloEdgeTypePolicy().revision)
+
+
+class TestBatchSimulation(unittest.TestCase):
+    def setUp(self):
+        MonteCarlo.condition_factors = {
+            "weather": {"factor": 0.2},
+            "traffic": {"factor": 0.3},
+        }
+        test = tests["p1.2.r"]
+        self.data = test.instance_data
+        nodes = HeuristicUtils.to_node_list(self.data["node_list"])
+        _, self.solution = HeuristicUtils.generate_initial_solution(
+            self.data, self.data["fleet_size"], self.data["route_max_cost"], nodes
+        )
+
+    def test_matches_scalar_simulation(self):
+        np.random.seed(3)
+        MonteCarlo.simulation(self.solution, 5000, self.data["route_max_cost"], 1.0)
+        expected = self.solution.reward_after
+        MonteCarlo.batch_simulation([self.solution], 5000, self.data["route_max_cost"], 1.0)
+        self.assertAlmostEqual(self.solution.reward_after, expected, delta=0.05 * expected)
+
+    def test_common_random_numbers(self):
+        copies = [deepcopy(self.solution) for _ in range(3)]
+        MonteCarlo.batch_simulation(copies, 100, self.data["route_max_cost"], 1.0)
+        self.assertEqual(len({solution.reward_after for solution in copies}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()